@@ -0,0 +1,41 @@
+"""WebSocket endpoint for streamed audio."""
+import asyncio
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+
+from core.liveness.audio_liveness import StreamingAudioAnalyzer
+from apps.backend.api import ws
+from apps.backend.config import settings
+
+router = APIRouter()
+
+@router.websocket("/ws/audio")
+async def audio_endpoint(websocket: WebSocket, rate: int = Query(16000, gt=0, le=192000)):
+    """
+    Binary messages of mono little-endian int16 PCM at `rate` Hz (query
+    parameter). Every chunk is answered with the rolling audio liveness
+    score (None until enough audio arrived) and its running statistics.
+    Rates outside 1-192000 Hz are refused with close code 1008, chunks
+    longer than `audio_max_chunk_sec` with close code 1009.
+    """
+    await websocket.accept()
+    analyzer = StreamingAudioAnalyzer(rate=rate, halflife_sec=settings.audio_halflife_sec)
+    max_bytes = 2 * int(settings.audio_max_chunk_sec * rate) # int16 samples
+
+    try:
+        while True:
+            chunk = await websocket.receive_bytes()
+            if len(chunk) > max_bytes:
+                await websocket.close(code=1009, reason=f"Audio chunks are limited to {settings.audio_max_chunk_sec:g} s")
+                return
+            try:
+                # The STFT runs on the frame workers (the loop's default
+                # executor without them), never on the event loop
+                score = await asyncio.get_running_loop().run_in_executor(ws.executor, analyzer.push, chunk)
+                await websocket.send_json({"score": score, **analyzer.stats()})
+            except Exception as e:
+                print(f"Error processing audio: {e}")
+                await websocket.send_json({"error": str(e)})
+
+    except WebSocketDisconnect:
+        print("Audio client disconnected")
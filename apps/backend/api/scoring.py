@@ -1,5 +1,7 @@
 """Trust scoring API endpoint."""
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+
+from apps.backend.sessions import registry
 
 router = APIRouter()
 
@@ -8,10 +10,25 @@ def get_score():
     """
     Get the current trust score.
     Note: Real-time scoring happens via WebSocket at /ws/liveness.
-    This endpoint could be used to retrieve the final session score.
+    Per-session scores are served by /score/{session_id}.
     """
     return {
-        "trust_score": 0.0, 
+        "trust_score": 0.0,
         "state": "unknown",
         "info": "Connect to /ws/liveness for real-time scoring."
     }
+
+@router.get("/score/{session_id}")
+async def get_session_score(session_id: str, history: bool = False):
+    """
+    Latest trust of a liveness session, from the in-memory session registry.
+
+    Answers from the registry only (O(1), on the event loop), never from the
+    video pipeline. `trust_score` is None until the first analysis; `state`
+    is the latest frame status, or "closed" once the client disconnected.
+    Set `history` to include the score of every analysis.
+    """
+    record = registry.get(session_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+    return record.to_dict(history=history)
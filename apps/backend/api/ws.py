@@ -1,184 +1,429 @@
 """WebSocket endpoint for video frames."""
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-import cv2
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import numpy as np
-import base64
-import json
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 
 from core.vision.face_detector import FaceDetector
-from core.rppg.signal_extractor import SignalExtractor
-from core.rppg.features import FeatureExtractor
-from core.rppg.filters import BandpassFilter
-from core.liveness.liveness import PhysioFeatures, compute_liveness_result
+from core.vision.roi_engine import ROIEngine
+from core.rppg.stream import RPPGStream
+from core.rppg.scheduler import AnalysisScheduler
+from core.rppg.resample import UniformResampler
+from core.rppg.features import correlation_matrix, feature_rows
+from core.liveness.liveness import compute_liveness_result, physio_features_from_rois
+from core.liveness.challenge_engine import ChallengeEngine
+from core.scoring.sequential import SequentialTest
+from apps.backend.config import settings
+from apps.backend.engine import BatchEngine
+from apps.backend import metrics
+from apps.backend.protocol import decode_message, reduction_for
+from apps.backend.ingest import FrameIngest
+from apps.backend.sessions import registry
 
 router = APIRouter()
 
+# Frame decoding and analysis run here instead of on the event loop, so a slow
+# frame only occupies one worker instead of stalling every connection
+executor = ThreadPoolExecutor(
+    max_workers=settings.frame_workers, thread_name_prefix="liveness"
+) if settings.frame_workers > 0 else None
+
+# Shared across connections when batched analysis is enabled
+engine = BatchEngine(
+    tick_ms=settings.batch_tick_ms, executor=executor
+) if settings.batch_engine else None
+
 class LivenessSession:
-    def __init__(self):
+    def __init__(
+        self,
+        hop_frames: Optional[int] = None,
+        hop_ms: Optional[float] = None,
+        engine: Optional[BatchEngine] = None,
+        fs: Optional[int] = None,
+        sequential: Optional[bool] = None,
+        challenges: Optional[bool] = None
+    ):
         self.face_detector = FaceDetector()
-        self.signal_extractor = SignalExtractor()
-        self.feature_extractor = FeatureExtractor(fs=30)
-        self.bandpass_filter = BandpassFilter(fs=30)
         
-        self.buffer_size = 150 # 5 seconds @ 30fps
-        self.roi_buffers: Dict[str, List[np.ndarray]] = {
-            "forehead": [], 
-            "left_cheek": [], 
-            "right_cheek": []
-        }
+        # Frames are resampled onto a uniform `fs` grid by capture time, so
+        # clients may send 12-60 fps with jitter and frames may be dropped
+        self.fs = fs if fs is not None else settings.analysis_fs
+        self.resampler = UniformResampler(fs=self.fs)
+        self.buffer_size = 5 * self.fs # 5 seconds
+        # Heuristic forehead/cheek ROIs plus a dense grid and a skin-mask ROI,
+        # all averaged from integral images of the face crop
+        self.roi_engine = ROIEngine(regions={
+            "forehead": (0.3, 0.1, 0.7, 0.25),
+            "left_cheek": (0.15, 0.55, 0.35, 0.7),
+            "right_cheek": (0.65, 0.55, 0.85, 0.7)
+        })
+        self.roi_names = list(self.roi_engine.names)
+        # Per-ROI mean colors plus streaming POS, bandpass and features
+        self.stream = RPPGStream(len(self.roi_names), fs=self.fs, buffer_size=self.buffer_size)
+        # Full analysis once per hop; the cached verdict is served in between
+        self.scheduler = AnalysisScheduler(
+            hop_frames=hop_frames if hop_frames is not None else settings.analysis_hop_frames,
+            hop_ms=hop_ms if hop_ms is not None else settings.analysis_hop_ms
+        )
+        self.last_analysis: Optional[Dict] = None
+        # Sequential mode analyzes as soon as `min_analysis_sec` of settled pulse
+        # signal exists (POS lags by one window) and accumulates evidence over
+        # hops; otherwise the first analysis waits for a full buffer.
+        if sequential is None:
+            sequential = settings.sequential_decision
+        if sequential:
+            self.sequential = SequentialTest(
+                alpha=settings.sprt_alpha, beta=settings.sprt_beta, min_observations=settings.sprt_min_hops
+            )
+            self.min_samples = min(
+                self.buffer_size,
+                int(settings.min_analysis_sec * self.fs) + self.stream.pulse.window - 1
+            )
+        else:
+            self.sequential = None
+            self.min_samples = self.buffer_size
+        # With a shared engine, due analyses are batched across sessions:
+        # the handler then awaits `analyze_batched`.
+        self.engine = engine
+        self.analysis_due = False
         self.frame_count = 0
+        self.analysis_count = 0
+        # Filtered samples added by the last hop (weights its SPRT evidence)
+        self.new_samples = 0
+        # Active challenges run alongside the pulse analysis: prompts are sent
+        # with the frame results and checked from each frame's face landmarks
+        if challenges is None:
+            challenges = settings.active_challenges
+        # FaceMesh only runs while a prompt is active. Without it, neither
+        # blinks nor head rotation can be verified (the face box tracks
+        # position, not rotation), so the session runs on the pulse alone.
+        self.landmarks = None
+        if challenges:
+            from core.vision.landmarks import LandmarkService
+            service = LandmarkService(every=settings.challenge_mesh_every)
+            if service.face_mesh is not None:
+                self.landmarks = service
+            else:
+                print("FaceMesh unavailable: running without active challenges")
+        self.challenges = ChallengeEngine(
+            count=settings.challenge_count,
+            timeout=settings.challenge_timeout_sec
+        ) if self.landmarks is not None else None
+        # Reduced-resolution decoding: sizes of the last frame and face in
+        # the client's pixels, and the reduction the detector state is in
+        self.frame_width: Optional[int] = None
+        self.face_width: Optional[int] = None
+        self.reduction = 1
+
+    def decode_reduction(self) -> int:
+        """
+        Reduction factor to decode the next frame at.
 
-    def process_frame(self, frame: np.ndarray):
+        Keeps the last face at least `decode_min_face_px` wide. Without a
+        face, frames are decoded just large enough for the detector's
+        full-frame scan, which downscales to `max_width` anyway. Switching to
+        a coarser factor needs 25% headroom, so a face near the threshold
+        does not flip the factor every frame.
+        """
+        if not settings.reduced_decode or self.frame_width is None:
+            return 1
+        if self.face_width is None:
+            max_width = self.face_detector.max_width
+            return reduction_for(self.frame_width, max_width) if max_width else 1
+        reduction = reduction_for(self.face_width, settings.decode_min_face_px)
+        if reduction > self.reduction and \
+                self.face_width / reduction < 1.25 * settings.decode_min_face_px:
+            return self.reduction
+        return reduction
+
+    def process_frame(self, frame: np.ndarray, timestamp: Optional[float] = None, reduction: int = 1):
+        """
+        Args:
+            frame: BGR image.
+            timestamp: Capture time in seconds; defaults to now. Callers
+                       without a capture time pass the arrival time, which
+                       carries network jitter but not queueing delay.
+            reduction: The frame was decoded at 1/reduction of the client's
+                       image; the returned bbox is in the client's pixels.
+        """
         self.frame_count += 1
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if reduction != self.reduction:
+            # Carry the detector's search window over to the new scale
+            if self.face_detector.last_box is not None:
+                ratio = self.reduction / reduction
+                self.face_detector.last_box = tuple(int(round(v * ratio)) for v in self.face_detector.last_box)
+            self.reduction = reduction
+        self.frame_width = frame.shape[1] * reduction
         
         # 1. Detect Face
         face_bbox = self.face_detector.detect(frame)
-        if not face_bbox:
+        self.face_width = face_bbox[2] * reduction if face_bbox is not None else None
+        challenge = self._update_challenge(frame, timestamp, face_bbox, reduction)
+        if face_bbox is None:
             # Clear buffers if face lost to avoid mixing signals
             self._reset_buffers()
-            return {
+            result_data = {
                 "status": "no_face",
                 "bbox": None
             }
+            if challenge is not None:
+                result_data["challenge"] = challenge
+            return result_data
             
         x, y, w, h = face_bbox
         
-        # 2. Extract ROIs
-        rois = self._get_rois(frame, face_bbox)
+        # 2. Extract ROI means
+        means = self.roi_engine.extract_means(frame, face_bbox)
         
-        # 3. Accumulate Means
-        for name, (rx, ry, rw, rh) in rois.items():
-            roi_patch = frame[ry:ry+rh, rx:rx+rw]
-            if roi_patch.size == 0: continue
-            
-            mean_color = np.mean(roi_patch, axis=(0, 1))
-            self.roi_buffers[name].append(mean_color)
-            
-            if len(self.roi_buffers[name]) > self.buffer_size:
-                self.roi_buffers[name].pop(0)
+        # 3. Accumulate Means, resampled onto the uniform grid
+        if means is not None:
+            if self.resampler.gap(timestamp) * 1000.0 > settings.max_frame_gap_ms:
+                self._reset_buffers()
+            for sample in self.resampler.push(timestamp, means):
+                self.stream.push(sample)
         
         # 4. Process if buffer full
         result_data = {
             "status": "collecting",
-            "bbox": [int(x), int(y), int(w), int(h)],
-            "progress": min(1.0, len(self.roi_buffers["forehead"]) / self.buffer_size)
+            "bbox": [int(v * reduction) for v in (x, y, w, h)],
+            "progress": min(1.0, len(self.stream.means) / self.min_samples)
         }
+        if challenge is not None:
+            result_data["challenge"] = challenge
         
-        if len(self.roi_buffers["forehead"]) == self.buffer_size:
-            liveness_result = self._compute_liveness()
-            result_data.update({
-                "status": "analyzed",
-                "liveness": liveness_result.level,
-                "score": liveness_result.final_score,
-                "bpm": liveness_result.debug.get("physio_bpm", 0),
-                "snr": liveness_result.debug.get("physio_snr", 0),
-                "reasons": liveness_result.reasons
-            })
+        if len(self.stream.means) >= self.min_samples:
+            if self.scheduler.tick():
+                self.scheduler.mark()
+                # Analysis hop: run the signal stages over the new samples
+                self.new_samples = self.stream.advance()
+                if self.engine is None:
+                    self._set_analysis(self._compute_liveness())
+                else:
+                    self.analysis_due = True
+            # Between hops the last verdict is repeated with its age
+            if self.last_analysis is not None:
+                result_data.update(self.last_analysis)
+                result_data["stale_ms"] = self.scheduler.stale_ms()
             
         return result_data
 
-    def _reset_buffers(self):
-        for k in self.roi_buffers:
-            self.roi_buffers[k] = []
-
-    def _get_rois(self, frame, bbox):
-        x, y, w, h = bbox
-        # Simple heuristic ROIs
-        return {
-            "forehead": (x + int(w*0.3), y + int(h*0.1), int(w*0.4), int(h*0.15)),
-            "left_cheek": (x + int(w*0.15), y + int(h*0.55), int(w*0.2), int(h*0.15)),
-            "right_cheek": (x + int(w*0.65), y + int(h*0.55), int(w*0.2), int(h*0.15))
+    async def analyze_batched(self) -> Dict:
+        """Run the due analysis on the shared engine and return the new verdict."""
+        self.analysis_due = False
+        physio = await self.engine.analyze(self.stream, self.roi_names)
+        self._set_analysis(compute_liveness_result(physio, self._challenge_results()))
+        return {**self.last_analysis, "stale_ms": self.scheduler.stale_ms()}
+
+    def _set_analysis(self, liveness_result):
+        self.analysis_count += 1
+        decision = None
+        if self.sequential is not None:
+            decision = self._gate_decision(self.sequential.update(
+                liveness_result.physio_score, weight=self.evidence_weight()
+            ))
+        self.last_analysis = {
+            "status": "analyzed",
+            "liveness": liveness_result.level,
+            "score": liveness_result.final_score,
+            # Pulse-only score, the evidence the sequential test accumulates
+            "physio_score": liveness_result.physio_score,
+            "bpm": liveness_result.debug.get("physio_bpm", 0),
+            "snr": liveness_result.debug.get("physio_snr", 0),
+            "reasons": liveness_result.reasons,
+            # Sequential verdict: None while the evidence is still ambiguous
+            "decision": decision
         }
 
+    def evidence_weight(self) -> float:
+        """
+        SPRT weight of the current hop.
+
+        Successive hops analyze overlapping windows, so their scores are far
+        from independent: by default a hop only counts for the share of its
+        window that is new (about hop / window once the buffer is full, all
+        of it for the first hop). `sprt_evidence_weight` overrides this.
+        """
+        if settings.sprt_evidence_weight is not None:
+            return settings.sprt_evidence_weight
+        window = len(self.stream.filtered)
+        return min(1.0, self.new_samples / window) if window else 0.0
+
+    def _gate_decision(self, decision):
+        """
+        Combine the SPRT verdict on the pulse with the active challenges.
+
+        The SPRT only sees physio scores. With challenges enabled, HIGH also
+        requires every challenge to have passed: it waits (None) while
+        challenges are outstanding and becomes LOW if any failed.
+        """
+        if decision != "HIGH" or self.challenges is None:
+            return decision
+        if any(not (c.timing_ok and c.geometry_ok) for c in self.challenges.results):
+            return "LOW"
+        if not self.challenges.done:
+            return None
+        return decision
+
+    def _update_challenge(self, frame, timestamp, face_bbox, reduction=1):
+        """Advance the challenge state machine; returns its status for the client."""
+        if self.challenges is None:
+            return None
+        landmarks = ear = None
+        if face_bbox is not None and self.challenges.needs_landmarks:
+            from core.vision.landmarks import eye_aspect_ratios
+            landmarks = self.landmarks.process(frame, timestamp)
+            if landmarks is not None:
+                ear = float(eye_aspect_ratios(landmarks).mean())
+                landmarks = landmarks * reduction
+        # Geometry in the client's pixels, whatever the decode reduction
+        if face_bbox is not None:
+            face_bbox = tuple(v * reduction for v in face_bbox)
+        return self.challenges.update(timestamp, face_bbox, landmarks, ear)
+
+    def _challenge_results(self):
+        return self.challenges.results if self.challenges is not None else []
+
+    def _reset_buffers(self):
+        self.stream.reset()
+        self.resampler.reset()
+        if self.sequential is not None:
+            self.sequential.reset()
+        self.scheduler.reset()
+        self.last_analysis = None
+        self.analysis_due = False
+
     def _compute_liveness(self):
-        signals = {}
-        for name, data in self.roi_buffers.items():
-            if not data: continue
-            data_np = np.array(data)
-            raw = self.signal_extractor._pos(data_np)
-            filtered = self.bandpass_filter.apply(raw)
-            signals[name] = filtered
+        # Extract features (all ROIs at once)
+        feats = feature_rows(self.stream.features.features())
+        roi_features = dict(zip(self.roi_names, feats))
             
-        # Extract features
-        roi_features = {}
-        bpms = []
-        snrs = []
-        ibi_cvs = []
+        # Cross-ROI Correlation: one matrix for all ROI pairs
+        correlations = correlation_matrix(self.stream.filtered.view())
         
-        for name, sig in signals.items():
-            feats = self.feature_extractor.extract(sig)
-            roi_features[name] = feats
-            if feats['hr_bpm'] > 0: bpms.append(feats['hr_bpm'])
-            snrs.append(feats['snr'])
-            ibi_cvs.append(feats['ibi_cv'])
-            
-        # Cross-ROI Correlation
-        correlations = []
-        names = list(signals.keys())
-        for i in range(len(names)):
-            for j in range(i+1, len(names)):
-                s1 = signals[names[i]]
-                s2 = signals[names[j]]
-                # Normalize
-                if np.std(s1) > 0 and np.std(s2) > 0:
-                    s1 = (s1 - np.mean(s1)) / np.std(s1)
-                    s2 = (s2 - np.mean(s2)) / np.std(s2)
-                    corr = np.corrcoef(s1, s2)[0, 1]
-                    correlations.append(corr)
-                    
-        mean_corr = np.mean(correlations) if correlations else 0.0
-        
-        physio = PhysioFeatures(
-            bpm_mean=float(np.mean(bpms)) if bpms else 0.0,
-            bpm_std=float(np.std(bpms)) if bpms else 0.0,
-            snr_mean=float(np.mean(snrs)) if snrs else 0.0,
-            snr_std=float(np.std(snrs)) if snrs else 0.0,
-            cross_roi_corr_mean=float(mean_corr),
-            ibi_cv=float(np.mean(ibi_cvs)) if ibi_cvs else 0.0,
-            roi_features=roi_features
-        )
-        
-        return compute_liveness_result(physio, [])
+        physio = physio_features_from_rois(roi_features, correlations)
+        return compute_liveness_result(physio, self._challenge_results())
+
+def handle_message(
+    session: LivenessSession, data: Union[bytes, str], arrival: Optional[float] = None
+) -> Optional[Dict]:
+    """
+    Decode and process one message; all the CPU work of a frame.
+
+    Args:
+        arrival: time.monotonic() when the message was received, the frame
+                 time of messages without a capture timestamp.
+    """
+    message = decode_message(data, session.decode_reduction())
+    if message is None:
+        return None
+    timestamp = message.timestamp if message.timestamp is not None else arrival
+    result = session.process_frame(message.frame, timestamp, message.reduction)
+    if message.seq is not None:
+        # Lets the client match results to frames
+        result["seq"] = message.seq
+    return result
+
+async def process_message(
+    session: LivenessSession, data: Union[bytes, str], arrival: Optional[float] = None
+) -> Optional[Dict]:
+    """
+    Process one message on the frame executor and record its latency.
+
+    The caller awaits each message before taking the next one, so a
+    session's frames are processed in order, one at a time, while frames of
+    other sessions run on the other workers.
+    """
+    start = time.perf_counter()
+    if executor is not None:
+        result = await asyncio.get_running_loop().run_in_executor(executor, handle_message, session, data, arrival)
+    else:
+        result = handle_message(session, data, arrival)
+    if result is not None and session.analysis_due:
+        result.update(await session.analyze_batched())
+    metrics.frame_latency.record((time.perf_counter() - start) * 1000.0)
+    return result
+
+async def receive_frames(websocket: WebSocket, ingest: FrameIngest):
+    """Receive messages into the ingest queue until the client disconnects."""
+    try:
+        while True:
+            # Binary frames (see apps/backend/protocol.py), or JSON text
+            # messages with a base64 image as the fallback
+            message = await websocket.receive()
+            # Stamped on arrival, before the message waits in the queue
+            arrival = time.monotonic()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data is None:
+                data = message.get("text")
+            if data is not None:
+                ingest.put(data, arrival)
+    finally:
+        ingest.close()
 
 @router.websocket("/ws/liveness")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, challenges: Optional[bool] = None):
+    """
+    Liveness over a stream of frames. The verdict is also published to the
+    session registry under a server-generated id, announced in the first
+    message, for GET /api/v1/score/{session_id}.
+    Clients that render challenge prompts pass `challenges=true`; the
+    default follows settings.active_challenges. Challenges need FaceMesh
+    on the server and are skipped without it.
+    """
     await websocket.accept()
-    session = LivenessSession()
+    metrics.loop_lag.start()
+    session = LivenessSession(engine=engine, challenges=challenges)
+    session_id = registry.open().session_id
+    await websocket.send_json({"type": "session", "session_id": session_id})
+    # Receiving runs independently of processing: when analysis falls behind,
+    # stale frames are dropped instead of queueing up latency
+    ingest = FrameIngest(
+        size=settings.ingest_queue_size,
+        window_sec=settings.backpressure_window_sec,
+        drop_ratio=settings.backpressure_drop_ratio
+    )
+    receiver = asyncio.create_task(receive_frames(websocket, ingest))
     
     try:
         while True:
-            # Expecting JSON with base64 image: {"image": "base64string..."}
-            data = await websocket.receive_text()
+            item = await ingest.get()
+            if item is None:
+                break
+            data, arrival = item
             try:
-                payload = json.loads(data)
-                image_b64 = payload.get("image")
-                
-                if not image_b64:
-                    continue
-                    
-                # Decode image
-                # Remove header if present (e.g., "data:image/jpeg;base64,")
-                if "," in image_b64:
-                    image_b64 = image_b64.split(",")[1]
-                    
-                image_bytes = base64.b64decode(image_b64)
-                nparr = np.frombuffer(image_bytes, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                
-                if frame is None:
-                    continue
-                
-                # Process
-                result = session.process_frame(frame)
-                
-                # Send back result
-                await websocket.send_json(result)
+                analyses = session.analysis_count
+                result = await process_message(session, data, arrival)
+                if result is not None:
+                    registry.update(session_id, result, analyzed=session.analysis_count != analyses)
+                    result["dropped"] = ingest.dropped
+                    # Send back result
+                    await websocket.send_json(result)
                 
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
                 print(f"Error processing frame: {e}")
                 await websocket.send_json({"error": str(e)})
+
+            # Persistent drops: ask the client to lower its frame rate
+            notice = ingest.backpressure()
+            if notice is not None:
+                await websocket.send_json(notice)
                 
     except WebSocketDisconnect:
-        print("Client disconnected")
+        pass
+    finally:
+        receiver.cancel()
+        registry.close(session_id)
+    print("Client disconnected")
+
+@router.get("/metrics/liveness")
+def liveness_metrics():
+    """Event-loop lag and frame latency (p50/p99/max ms) of the liveness WebSocket."""
+    return metrics.snapshot()
@@ -1,8 +1,59 @@
 """Backend configuration."""
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     debug: bool = True
     ws_port: int = 8000
+    # Uniform rate (Hz) the rPPG traces are resampled to, whatever the client frame rate
+    analysis_fs: int = 30
+    # Frame gaps longer than this restart the signal instead of being interpolated over
+    max_frame_gap_ms: float = 1000.0
+    # Liveness analysis cadence per session; the cached verdict is sent in between
+    analysis_hop_frames: Optional[int] = 10
+    analysis_hop_ms: Optional[float] = None
+    # Sequential (SPRT) early decision: analyze from `min_analysis_sec` of pulse
+    # signal and issue HIGH/LOW as soon as the evidence over hops is conclusive
+    sequential_decision: bool = True
+    min_analysis_sec: float = 2.0
+    sprt_alpha: float = 0.01
+    sprt_beta: float = 0.01
+    # Weight of one hop's evidence; None: the share of its window that is new
+    sprt_evidence_weight: Optional[float] = None
+    # Hops before the SPRT may decide: no verdict from a single early window
+    sprt_min_hops: int = 3
+    # Audio score on /ws/audio follows the call: older audio weighs half after this long
+    audio_halflife_sec: Optional[float] = 10.0
+    # Longer /ws/audio chunks are refused (close 1009): each one is analyzed in one go
+    audio_max_chunk_sec: float = 1.0
+    # Active challenges pushed over /ws/liveness and verified from the incoming
+    # frames. Off by default: a client that does not show the prompts fails
+    # them, which caps the score below HIGH. Clients opt in with ?challenges=true.
+    active_challenges: bool = False
+    challenge_count: int = 2
+    challenge_timeout_sec: float = 5.0
+    # Challenges are verified from FaceMesh landmarks, run every N frames while a
+    # prompt is active; without FaceMesh, sessions run without challenges
+    challenge_mesh_every: int = 2
+    # Threads decoding and analyzing frames off the event loop (0: inline).
+    # OpenCV and NumPy release the GIL, so sessions run in parallel.
+    frame_workers: int = 4
+    # Decode client images at 1/2, 1/4 or 1/8 resolution while the last face
+    # stays at least `decode_min_face_px` wide (full resolution until a face is found)
+    reduced_decode: bool = True
+    decode_min_face_px: int = 120
+    # Frames waiting per session; older ones are dropped when analysis falls behind
+    ingest_queue_size: int = 2
+    # Ask the client to slow down when this share of a window's frames was dropped
+    backpressure_window_sec: float = 2.0
+    backpressure_drop_ratio: float = 0.2
+    # Session registry behind /api/v1/score/{session_id}: entries expire this
+    # long after their last frame, the least recently updated beyond `max_sessions`
+    session_ttl_sec: float = 900.0
+    max_sessions: int = 10000
+    session_history: int = 300
+    # Batch due analyses of all sessions into one computation per tick
+    batch_engine: bool = False
+    batch_tick_ms: float = 20.0
 
 settings = Settings()
@@ -0,0 +1,94 @@
+"""Cross-session batched rPPG engine."""
+import asyncio
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from core.rppg.batch import BatchAnalyzer
+from core.rppg.stream import RPPGStream
+from core.rppg.features import feature_rows
+from core.liveness.liveness import PhysioFeatures, physio_features_from_rois
+
+
+class BatchEngine:
+    """
+    Gathers the sessions due for analysis and reads out their features and
+    cross-ROI correlations once per tick, with the correlations of all
+    sessions computed over a single (sessions, ROIs, window) tensor instead
+    of many small per-session NumPy calls. Results are scattered back as
+    PhysioFeatures.
+
+    Sessions run the streaming signal stages themselves (RPPGStream.advance),
+    exactly as without the engine, so batching never changes a verdict.
+    They are grouped by their exact (ROIs, filtered samples) shape, since
+    padding would change the correlations; sessions still warming up
+    (sequential mode) form their own small groups until their buffers are
+    full. The stack is built per flush, so idle shapes hold no memory, and
+    analyzed on `executor` so the event loop never runs the readout.
+    """
+
+    def __init__(self, tick_ms: float = 20.0, max_batch: int = 256,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+            executor: Where batches are analyzed; None uses the loop's
+                      default executor.
+        """
+        self.analyzer = BatchAnalyzer()
+        self.tick_ms = tick_ms
+        self.max_batch = max_batch
+        self.executor = executor
+        self._pending: Dict[Tuple[int, int], List[Tuple[RPPGStream, asyncio.Future, Sequence[str]]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Set[asyncio.Task] = set()
+
+    async def analyze(self, stream: RPPGStream, roi_names: Sequence[str]) -> PhysioFeatures:
+        """
+        Queue one session for the next tick and wait for its features.
+
+        Args:
+            stream: The session's stream, advanced up to its newest sample.
+                    It is read on the executor, so the session must not push
+                    or advance it until the features are returned.
+            roi_names: ROI names, in row order.
+        """
+        shape = stream.filtered.view().shape
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(shape, [])
+        pending.append((stream, future, roi_names))
+        if len(pending) >= self.max_batch:
+            # Full: analyze now rather than at the next tick
+            task = asyncio.create_task(self._flush(self._pending.pop(shape)))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await future
+
+    async def flush(self):
+        """Analyze everything queued so far."""
+        groups, self._pending = list(self._pending.values()), {}
+        await asyncio.gather(*[self._flush(pending) for pending in groups])
+
+    async def _flush(self, pending):
+        try:
+            streams = [stream for stream, _, _ in pending]
+            features, correlations = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.analyzer.analyze, streams
+            )
+        except Exception as e:
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for s, (_, future, roi_names) in enumerate(pending):
+            if future.done(): # Session went away while waiting
+                continue
+            rows = feature_rows({key: values[s] for key, values in features.items()})
+            future.set_result(physio_features_from_rois(dict(zip(roi_names, rows)), correlations[s]))
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(self.tick_ms / 1000.0)
+            await self.flush()
@@ -0,0 +1,111 @@
+"""Per-session latest-frame-wins ingest queue."""
+import asyncio
+import collections
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class FrameIngest:
+    """
+    Bounded buffer between receiving and processing frames of one session.
+
+    The receiver puts every message without waiting; once `size` messages
+    are pending, the oldest is dropped, so the processor always works on
+    the newest frames and latency stays bounded by the buffer instead of
+    growing with the backlog. When a large share of frames keeps being
+    dropped, `backpressure` returns a notice asking the client to slow down.
+    """
+
+    def __init__(self, size: int = 2, window_sec: float = 2.0, drop_ratio: float = 0.2):
+        """
+        Args:
+            size: Pending messages kept.
+            window_sec: Interval over which drops are measured (and the
+                        minimum time between two backpressure notices).
+            drop_ratio: Share of dropped frames in a window that triggers a
+                        backpressure notice.
+        """
+        self.pending = collections.deque(maxlen=size)
+        self.window_sec = window_sec
+        self.drop_ratio = drop_ratio
+        self._ready = asyncio.Event()
+        self.closed = False
+
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self._window_start = time.monotonic()
+        self._window_counts = (0, 0, 0)
+
+    def put(self, item: Any, arrival: Optional[float] = None) -> bool:
+        """
+        Queue a message; returns True if an older one was dropped for it.
+
+        Args:
+            arrival: time.monotonic() when the message arrived (default: now).
+                     Kept with the message, since it may wait here and on
+                     the workers before it is processed.
+        """
+        self.received += 1
+        dropped = len(self.pending) == self.pending.maxlen
+        if dropped:
+            self.dropped += 1
+        arrival = time.monotonic() if arrival is None else arrival
+        self.pending.append((item, arrival)) # deque(maxlen) evicts the oldest
+        self._ready.set()
+        return dropped
+
+    def close(self):
+        """Client gone: pending messages are discarded and `get` returns None."""
+        self.closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[Tuple[Any, float]]:
+        """Oldest pending (message, arrival time), waiting for one; None once closed."""
+        while not self.pending and not self.closed:
+            self._ready.clear()
+            await self._ready.wait()
+        if self.closed:
+            self.pending.clear()
+            return None
+        self.processed += 1
+        return self.pending.popleft()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "pending": len(self.pending)
+        }
+
+    def backpressure(self, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Check the current window; at most one notice per window.
+
+        Returns:
+            dict: {"type": "backpressure", "drop_ratio", "suggested_fps", ...}
+                  when the window dropped at least `drop_ratio` of its
+                  frames, else None. `suggested_fps` is the rate the session
+                  actually processed.
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._window_start
+        if elapsed < self.window_sec:
+            return None
+
+        received0, processed0, dropped0 = self._window_counts
+        received = self.received - received0
+        processed = self.processed - processed0
+        dropped = self.dropped - dropped0
+        self._window_start = now
+        self._window_counts = (self.received, self.processed, self.dropped)
+
+        if received == 0 or dropped / received < self.drop_ratio:
+            return None
+        return {
+            "type": "backpressure",
+            "drop_ratio": dropped / received,
+            "suggested_fps": processed / elapsed,
+            **self.stats()
+        }
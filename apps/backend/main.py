@@ -7,7 +7,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from apps.backend.api import scoring, ws
+from apps.backend.api import audio, scoring, ws
 
 app = FastAPI(title="VeriPulse API")
 
@@ -20,6 +20,7 @@ app.add_middleware(
 
 app.include_router(scoring.router, prefix="/api/v1", tags=["scoring"])
 app.include_router(ws.router, tags=["websocket"])
+app.include_router(audio.router, tags=["websocket"])
 
 @app.get("/health")
 def health():
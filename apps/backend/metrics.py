@@ -0,0 +1,71 @@
+"""Event-loop lag and frame latency metrics."""
+import asyncio
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class LatencyWindow:
+    """Percentiles over the most recent `size` latency samples (ms)."""
+
+    def __init__(self, size: int = 2048):
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.count = 0
+
+    def record(self, ms: float):
+        self.samples[self.count % len(self.samples)] = ms
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        recent = self.samples[:min(self.count, len(self.samples))]
+        if not recent.size:
+            return {"count": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        p50, p99 = np.percentile(recent, [50, 99])
+        return {
+            "count": self.count,
+            "p50_ms": float(p50),
+            "p99_ms": float(p99),
+            "max_ms": float(recent.max())
+        }
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: a task sleeps for `interval` and records how
+    much later than requested it wakes up. Anything that blocks the loop
+    (CPU work in a handler) shows up directly as lag.
+    """
+
+    def __init__(self, interval_ms: float = 50.0, size: int = 2048):
+        self.interval = interval_ms / 1000.0
+        self.lag = LatencyWindow(size)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start measuring on the running loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag.record(max(0.0, (time.perf_counter() - start - self.interval) * 1000.0))
+
+
+# Process-wide metrics of the liveness WebSocket
+loop_lag = LoopLagMonitor()
+frame_latency = LatencyWindow()
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    return {
+        "event_loop_lag": loop_lag.lag.summary(),
+        "frame_latency": frame_latency.summary()
+    }
@@ -0,0 +1,138 @@
+"""Frame message formats of /ws/liveness.
+
+Binary messages (preferred) carry a fixed 16-byte little-endian header
+followed by the encoded image:
+
+    offset  size  field
+    0       1     version (1)
+    1       1     codec (0 = JPEG, 1 = WebP)
+    2       2     reserved (0)
+    4       4     sequence number (uint32)
+    8       8     capture timestamp, ms on the client clock (float64, NaN if unknown)
+    16      -     image bytes
+
+The image is decoded straight from the received buffer. Text messages are
+the JSON fallback: {"image": "<base64, optional data: URL header>",
+"timestamp": ms, "seq": n}.
+
+Either can be decoded at 1/2, 1/4 or 1/8 resolution; for JPEG, libjpeg
+then skips most of the IDCT work instead of resizing afterwards.
+"""
+import base64
+import json
+import math
+import struct
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import cv2
+import numpy as np
+
+VERSION = 1
+CODEC_JPEG = 0
+CODEC_WEBP = 1
+CODECS = {CODEC_JPEG: "jpeg", CODEC_WEBP: "webp"}
+
+HEADER = struct.Struct("<BBHId")
+
+# Decode reduction factor -> imdecode flag
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class ProtocolError(ValueError):
+    """Malformed frame message."""
+
+
+@dataclass
+class FrameMessage:
+    frame: np.ndarray
+    timestamp: Optional[float] # seconds
+    seq: Optional[int] = None
+    reduction: int = 1 # frame is 1/reduction of the sent image
+
+
+def reduction_for(width: float, min_width: float) -> int:
+    """Largest decode reduction that keeps `width` (full-size pixels) at least `min_width`."""
+    for reduction in (8, 4, 2):
+        if width / reduction >= min_width:
+            return reduction
+    return 1
+
+
+def encode_binary(image: bytes, seq: int, timestamp_ms: Optional[float] = None, codec: int = CODEC_JPEG) -> bytes:
+    """Binary frame message (client side; used by tools and benchmarks)."""
+    ts = float("nan") if timestamp_ms is None else timestamp_ms
+    return HEADER.pack(VERSION, codec, 0, seq & 0xFFFFFFFF, ts) + image
+
+
+def decode_binary(data: bytes, reduction: int = 1) -> Optional[FrameMessage]:
+    """
+    Decode a binary frame message.
+
+    Args:
+        reduction: Decode at 1/reduction resolution (1, 2, 4 or 8).
+
+    Returns:
+        FrameMessage, or None if the image does not decode.
+
+    Raises:
+        ProtocolError: Short message, unknown version or codec.
+    """
+    if len(data) <= HEADER.size:
+        raise ProtocolError(f"Binary frame shorter than its {HEADER.size}-byte header")
+    version, codec, _, seq, timestamp = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ProtocolError(f"Unsupported frame version: {version}")
+    if codec not in CODECS:
+        raise ProtocolError(f"Unsupported codec: {codec}")
+
+    # View of the image bytes inside the received buffer, no copy
+    frame = cv2.imdecode(np.frombuffer(data, np.uint8, offset=HEADER.size), REDUCED_FLAGS[reduction])
+    if frame is None:
+        return None
+    return FrameMessage(frame, None if math.isnan(timestamp) else timestamp / 1000.0, seq, reduction)
+
+
+def decode_json(data: str, reduction: int = 1) -> Optional[FrameMessage]:
+    """
+    Decode a JSON frame message.
+
+    The optional capture timestamp (ms, client clock) beats arrival time,
+    which carries network jitter.
+
+    Args:
+        reduction: Decode at 1/reduction resolution (1, 2, 4 or 8).
+
+    Returns:
+        FrameMessage, or None if the message holds no decodable image.
+    """
+    payload = json.loads(data)
+    image_b64 = payload.get("image")
+
+    if not image_b64:
+        return None
+
+    # Remove header if present (e.g., "data:image/jpeg;base64,")
+    if "," in image_b64:
+        image_b64 = image_b64.split(",")[1]
+
+    image_bytes = base64.b64decode(image_b64)
+    frame = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), REDUCED_FLAGS[reduction])
+
+    if frame is None:
+        return None
+
+    timestamp = payload.get("timestamp")
+    return FrameMessage(frame, timestamp / 1000.0 if timestamp is not None else None, payload.get("seq"), reduction)
+
+
+def decode_message(data: Union[bytes, str], reduction: int = 1) -> Optional[FrameMessage]:
+    """Binary or JSON frame message, by message type."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return decode_binary(data, reduction)
+    return decode_json(data, reduction)
@@ -0,0 +1,149 @@
+"""In-memory registry of liveness sessions and their latest verdicts."""
+import collections
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+from apps.backend.config import settings
+
+# Result fields kept as a session's latest verdict
+VERDICT_FIELDS = ("status", "liveness", "score", "decision", "bpm", "snr")
+
+
+@dataclass
+class SessionRecord:
+    session_id: str
+    created_at: float # wall clock, seconds
+    updated_at: float
+    verdict: Dict = field(default_factory=dict)
+    # (wall clock, score) of every analysis, newest last
+    history: Deque[Tuple[float, float]] = field(default_factory=collections.deque)
+    frames: int = 0
+    closed: bool = False
+    expires: float = 0.0 # monotonic
+
+    def to_dict(self, history: bool = False) -> Dict:
+        data = {
+            "session_id": self.session_id,
+            "trust_score": self.verdict.get("score"),
+            "state": "closed" if self.closed else self.verdict.get("status", "collecting"),
+            "verdict": dict(self.verdict),
+            "frames": self.frames,
+            "analyses": len(self.history),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+        if history:
+            data["history"] = [{"t": t, "score": score} for t, score in self.history]
+        return data
+
+
+class SessionRegistry:
+    """
+    Latest verdict, score history and timestamps per session id.
+
+    Lookups and updates are O(1). Entries expire `ttl_sec` after their last
+    update (closed sessions stay readable until then) and the least
+    recently updated entry is evicted beyond `max_sessions`; with the
+    history capped per session, memory is bounded. Reads do not refresh an
+    entry, so polling a finished call does not keep it alive.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_sec: float = 900.0, history: int = 300):
+        self.max_sessions = max_sessions
+        self.ttl_sec = ttl_sec
+        self.history = history
+        # Ordered by last update: the head is the first to expire or be evicted
+        self._records: "collections.OrderedDict[str, SessionRecord]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def open(self) -> SessionRecord:
+        """
+        Register a new session under a fresh server-generated id.
+
+        Ids are never chosen by clients, so one connection cannot write into
+        (or resume) another call's entry.
+        """
+        with self._lock:
+            return self._create(uuid.uuid4().hex, time.time())
+
+    def update(self, session_id: str, result: Dict, analyzed: bool = False):
+        """
+        Record a frame result of an open connection.
+
+        The verdict is replaced, not merged: a result without a score (face
+        lost, buffers reset) clears the previous score, level and decision.
+        A record evicted while its connection is still open is re-created.
+
+        Args:
+            result: Frame result of LivenessSession.process_frame.
+            analyzed: True if the result carries a new analysis, which is
+                      added to the score history.
+        """
+        now = time.time()
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None:
+                record = self._create(session_id, now)
+            record.frames += 1
+            record.verdict = {key: result[key] for key in VERDICT_FIELDS if key in result}
+            if analyzed and result.get("score") is not None:
+                record.history.append((now, float(result["score"])))
+            self._touch(record, now)
+
+    def close(self, session_id: str):
+        """Mark a session finished; its verdict stays readable until it expires."""
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is not None:
+                record.closed = True
+                self._touch(record, time.time())
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        """The session's record, or None if unknown or expired."""
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is not None and record.expires <= time.monotonic():
+                del self._records[session_id]
+                self.expired += 1
+                return None
+            return record
+
+    def _create(self, session_id: str, now: float) -> SessionRecord:
+        record = SessionRecord(session_id, now, now, history=collections.deque(maxlen=self.history))
+        self._records[session_id] = record
+        self._touch(record, now)
+        return record
+
+    def _touch(self, record: SessionRecord, now: float):
+        record.updated_at = now
+        record.expires = time.monotonic() + self.ttl_sec
+        self._records.move_to_end(record.session_id)
+        self._evict()
+
+    def _evict(self):
+        # Expired entries sit at the head; pop them, then anything over capacity
+        deadline = time.monotonic()
+        while self._records:
+            session_id, record = next(iter(self._records.items()))
+            if record.expires <= deadline:
+                self.expired += 1
+            elif len(self._records) > self.max_sessions:
+                self.evicted += 1
+            else:
+                break
+            del self._records[session_id]
+
+
+registry = SessionRegistry(
+    max_sessions=settings.max_sessions,
+    ttl_sec=settings.session_ttl_sec,
+    history=settings.session_history
+)
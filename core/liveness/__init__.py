@@ -1,4 +1,14 @@
 # Liveness module - Challenge-response verification
-from .challenge_generator import generate_challenge
-from .motion_validator import validate_motion
-from .blink_detector import get_vision_score
+# Exports load on first access so that importing one check (e.g. audio)
+# does not pull in mediapipe for the vision checks.
+_EXPORTS = {
+    "generate_challenge": ".challenge_generator",
+    "validate_motion": ".motion_validator",
+    "get_vision_score": ".blink_detector",
+}
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
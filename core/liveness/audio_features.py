@@ -0,0 +1,136 @@
+# audio_features.py
+"""
+NumPy MFCC and spectral centroid matching librosa's defaults.
+
+Same definitions as `librosa.feature.mfcc` and
+`librosa.feature.spectral_centroid` with default arguments (2048-point
+periodic Hann STFT, hop 512, zero-padded centering, 128 Slaney mel bands
+up to Nyquist, power_to_db with top_db=80, orthonormal DCT-II), without
+importing librosa and its numba stack (or scipy.fft/scipy.signal, which
+are slow to import too). The mel filterbank and DCT matrix are built once
+per configuration.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+N_MFCC = 13
+TOP_DB = 80.0
+AMIN = 1e-10
+
+def hz_to_mel(freqs):
+    """Slaney mel scale: linear below 1 kHz, logarithmic above."""
+    freqs = np.asarray(freqs, dtype=np.float64)
+    f_sp = 200.0 / 3
+    mels = freqs / f_sp
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_t = freqs >= min_log_hz
+    return np.where(log_t, min_log_mel + np.log(np.maximum(freqs, min_log_hz) / min_log_hz) / logstep, mels)
+
+def mel_to_hz(mels):
+    mels = np.asarray(mels, dtype=np.float64)
+    f_sp = 200.0 / 3
+    freqs = f_sp * mels
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_t = mels >= min_log_mel
+    return np.where(log_t, min_log_hz * np.exp(logstep * (mels - min_log_mel)), freqs)
+
+@lru_cache(maxsize=None)
+def mel_filterbank(sr, n_fft=N_FFT, n_mels=N_MELS):
+    """(n_mels, 1 + n_fft // 2) Slaney-normalized triangular mel filters, fmin 0 to Nyquist."""
+    fftfreqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    mel_f = mel_to_hz(np.linspace(hz_to_mel(0.0), hz_to_mel(sr / 2.0), n_mels + 2))
+
+    fdiff = np.diff(mel_f)
+    ramps = mel_f[:, np.newaxis] - fftfreqs[np.newaxis, :]
+    lower = -ramps[:-2] / fdiff[:-1, np.newaxis]
+    upper = ramps[2:] / fdiff[1:, np.newaxis]
+    weights = np.maximum(0, np.minimum(lower, upper))
+
+    # Slaney normalization: constant energy per band
+    weights *= (2.0 / (mel_f[2:n_mels + 2] - mel_f[:n_mels]))[:, np.newaxis]
+    weights.setflags(write=False)
+    return weights
+
+@lru_cache(maxsize=None)
+def dct_matrix(n_mfcc=N_MFCC, n_mels=N_MELS):
+    """(n_mfcc, n_mels) orthonormal DCT-II rows."""
+    k = np.arange(n_mfcc)[:, np.newaxis]
+    n = np.arange(n_mels)[np.newaxis, :]
+    basis = np.sqrt(2.0 / n_mels) * np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels))
+    basis[0] /= np.sqrt(2.0)
+    basis.setflags(write=False)
+    return basis
+
+@lru_cache(maxsize=None)
+def _window(n_fft):
+    # Periodic Hann, as scipy.signal.get_window('hann', n_fft)
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)
+    window.setflags(write=False)
+    return window
+
+def magnitude_spectrogram(y, n_fft=N_FFT, hop_length=HOP_LENGTH, center=True):
+    """(1 + n_fft // 2, frames) STFT magnitude, as librosa.stft (zero-padded when centered)."""
+    y = np.asarray(y, dtype=np.float32)
+    if center:
+        y = np.pad(y, n_fft // 2, mode='constant')
+    if len(y) < n_fft:
+        return np.zeros((1 + n_fft // 2, 0), dtype=np.float32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(y, n_fft)[::hop_length]
+    return np.abs(np.fft.rfft(frames * _window(n_fft), axis=-1)).T
+
+def mfcc_from_magnitude(S, sr, n_mfcc=N_MFCC):
+    mel = mel_filterbank(sr, 2 * (S.shape[0] - 1)) @ (S.astype(np.float64) ** 2)
+    log_mel = 10.0 * np.log10(np.maximum(AMIN, mel))
+    if log_mel.size:
+        log_mel = np.maximum(log_mel, log_mel.max() - TOP_DB)
+    return dct_matrix(n_mfcc, mel.shape[0]) @ log_mel
+
+def centroid_from_magnitude(S, sr):
+    freqs = np.fft.rfftfreq(2 * (S.shape[0] - 1), 1.0 / sr)
+    total = S.sum(axis=0, dtype=np.float64)
+    # Silent frames stay 0, as librosa leaves all-zero columns unnormalized
+    centroid = np.divide(freqs @ S, total, out=np.zeros_like(total), where=total > np.finfo(np.float32).tiny)
+    return centroid[np.newaxis, :]
+
+def mfcc(y, sr, n_mfcc=N_MFCC, center=True):
+    """(n_mfcc, frames) MFCCs, as librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)."""
+    return mfcc_from_magnitude(magnitude_spectrogram(y, center=center), sr, n_mfcc)
+
+def spectral_centroid(y, sr, center=True):
+    """(1, frames) spectral centroid, as librosa.feature.spectral_centroid(y=y, sr=sr)."""
+    return centroid_from_magnitude(magnitude_spectrogram(y, center=center), sr)
+
+def mfcc_and_centroid(y, sr, n_mfcc=N_MFCC, center=True, backend="numpy"):
+    """
+    Both features from one STFT.
+
+    Args:
+        backend: "numpy", or "librosa" to compute them with librosa instead
+                 (optional dependency, imported on first use) for cross-checks.
+    """
+    if backend == "librosa":
+        import librosa
+        return (
+            librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc, center=center),
+            librosa.feature.spectral_centroid(y=y, sr=sr, center=center)
+        )
+    if backend != "numpy":
+        raise ValueError(f"Unknown backend: {backend}")
+
+    S = magnitude_spectrogram(y, center=center)
+    return mfcc_from_magnitude(S, sr, n_mfcc), centroid_from_magnitude(S, sr)
+
+def cross_check(y, sr, center=True):
+    """Largest absolute differences (mfcc, centroid) between the NumPy and librosa backends."""
+    ours = mfcc_and_centroid(y, sr, center=center)
+    ref = mfcc_and_centroid(y, sr, center=center, backend="librosa")
+    return tuple(float(np.max(np.abs(a - b))) if a.size else 0.0 for a, b in zip(ours, ref))
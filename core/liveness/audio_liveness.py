@@ -1,14 +1,17 @@
 # audio_liveness.py
 import numpy as np
-import librosa
-import pyaudio
 import time
+# PyAudio is only needed to record, and librosa only to cross-check the
+# features, so both are imported on first use: the backend can load this
+# module without them (and without librosa's numba stack).
+from .audio_features import N_FFT, HOP_LENGTH, N_MFCC, mfcc_and_centroid
 
 RATE = 16000
 CHUNK = 1024
 RECORD_SECONDS = 5
 
 def record_audio():
+    import pyaudio
     p = pyaudio.PyAudio()
     stream = p.open(format=pyaudio.paInt16, channels=1, rate=RATE, input=True, frames_per_buffer=CHUNK)
     frames = []
@@ -23,16 +26,18 @@ def record_audio():
     audio = np.frombuffer(b''.join(frames), dtype=np.int16).astype(np.float32)
     return audio
 
-def get_audio_score():
+def get_audio_score(backend="numpy"):
     audio = record_audio()
     y = audio / np.max(np.abs(audio) + 1e-6)
 
-    mfcc = librosa.feature.mfcc(y=y, sr=RATE, n_mfcc=13)
-    centroid = librosa.feature.spectral_centroid(y=y, sr=RATE)
+    mfcc, centroid = mfcc_and_centroid(y, RATE, n_mfcc=N_MFCC, backend=backend)
 
     mfcc_var = np.mean(np.var(mfcc, axis=1))
     centroid_var = np.var(centroid)
 
+    return score_from_variances(mfcc_var, centroid_var)
+
+def score_from_variances(mfcc_var, centroid_var):
     if mfcc_var > 50 and centroid_var > 1000:
         score = 1.0
     elif mfcc_var > 20:
@@ -42,5 +47,142 @@ def get_audio_score():
 
     return float(np.clip(score, 0, 1))
 
+class RunningMoments:
+    """Running mean/variance per column (Welford), optionally exponentially forgetting."""
+
+    def __init__(self, size, halflife=None):
+        """
+        Args:
+            size: Number of columns.
+            halflife: Observations after which an observation's weight halves.
+                      None weighs all observations equally.
+        """
+        self.decay = 0.5 ** (1.0 / halflife) if halflife else None
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+
+    def update(self, rows):
+        """Add observations, (n, size)."""
+        for x in np.atleast_2d(rows):
+            self.count += 1
+            delta = x - self.mean
+            if self.decay is None:
+                self.mean += delta / self.count
+                self.m2 += delta * (x - self.mean)
+            else:
+                # Exponentially weighted moments; m2 holds the variance directly
+                alpha = max(1.0 - self.decay, 1.0 / self.count)
+                self.mean += alpha * delta
+                self.m2 = (1 - alpha) * (self.m2 + alpha * delta * delta)
+
+    @property
+    def var(self):
+        """Population variance (np.var)."""
+        if self.count == 0:
+            return np.zeros_like(self.mean)
+        if self.decay is None:
+            return self.m2 / self.count
+        return self.m2
+
+class StreamingAudioAnalyzer:
+    def __init__(self, rate=RATE, halflife_sec=None, min_sec=0.5, backend="numpy"):
+        """
+        Incremental audio liveness: PCM chunks in, a rolling score out.
+
+        Complete 2048-sample frames (hop 512) are cut from the incoming chunks
+        and only the new frames are analyzed. The variance of every MFCC
+        coefficient and of the spectral centroid is tracked with running
+        moments, so the score is available after every chunk instead of
+        after a blocking recording.
+
+        Args:
+            rate: Sample rate of the PCM (Hz).
+            halflife_sec: Forget older audio with this half-life (seconds)
+                          so the score follows the call. None accumulates.
+            min_sec: Audio needed before a score is reported.
+            backend: Feature backend, "numpy" or "librosa".
+        """
+        self.rate = rate
+        self.backend = backend
+        frames_per_sec = rate / HOP_LENGTH
+        self.halflife = halflife_sec * frames_per_sec if halflife_sec else None
+        self.min_frames = max(1, int(min_sec * frames_per_sec))
+        self.reset()
+
+    def reset(self):
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.mfcc_moments = RunningMoments(N_MFCC, self.halflife)
+        self.centroid_moments = RunningMoments(1, self.halflife)
+
+    def push(self, pcm):
+        """
+        Add a chunk of mono PCM.
+
+        Args:
+            pcm: int16 bytes (e.g. from PyAudio or a WebSocket) or an array
+                 of samples (int16, or float in [-1, 1]).
+
+        Returns:
+            float: Rolling liveness score, or None until `min_sec` of audio.
+        """
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        else:
+            samples = np.asarray(pcm)
+            if samples.dtype == np.int16:
+                samples = samples.astype(np.float32) / 32768.0
+            samples = samples.astype(np.float32, copy=False)
+
+        audio = np.concatenate([self.tail, samples])
+        if len(audio) >= N_FFT:
+            n_frames = 1 + (len(audio) - N_FFT) // HOP_LENGTH
+            segment = audio[:(n_frames - 1) * HOP_LENGTH + N_FFT]
+            mfcc, centroid = self._frame_features(segment)
+            self.mfcc_moments.update(mfcc.T)
+            self.centroid_moments.update(centroid.T)
+            audio = audio[n_frames * HOP_LENGTH:]
+        self.tail = audio
+
+        return self.score()
+
+    def _frame_features(self, segment):
+        # Frames are cut here, so no centering/padding
+        return mfcc_and_centroid(segment, self.rate, n_mfcc=N_MFCC, center=False, backend=self.backend)
+
+    def stats(self):
+        return {
+            "mfcc_var": float(np.mean(self.mfcc_moments.var)),
+            "centroid_var": float(self.centroid_moments.var[0]),
+            "frames": self.mfcc_moments.count
+        }
+
+    def score(self):
+        if self.mfcc_moments.count < self.min_frames:
+            return None
+        stats = self.stats()
+        return score_from_variances(stats["mfcc_var"], stats["centroid_var"])
+
+    def callback(self, in_data, frame_count, time_info, status):
+        """PyAudio stream callback: `p.open(..., stream_callback=analyzer.callback)`."""
+        import pyaudio
+        self.push(in_data)
+        return (None, pyaudio.paContinue)
+
+def stream_microphone(analyzer, chunk=CHUNK):
+    """
+    Feed the default microphone into `analyzer` from a PyAudio callback.
+
+    Returns:
+        tuple: (PyAudio instance, stream); stop with `stream.stop_stream()`,
+               `stream.close()` and `p.terminate()`.
+    """
+    import pyaudio
+    p = pyaudio.PyAudio()
+    stream = p.open(format=pyaudio.paInt16, channels=1, rate=analyzer.rate, input=True,
+                    frames_per_buffer=chunk, stream_callback=analyzer.callback)
+    stream.start_stream()
+    return p, stream
+
 if __name__ == "__main__":
     print(get_audio_score())
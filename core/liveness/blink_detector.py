@@ -1,15 +1,8 @@
 # blink_detector.py
 import cv2
 import numpy as np
-import mediapipe as mp
 import time
-
-try:
-    mp_face = mp.solutions.face_mesh
-except AttributeError:
-    class MockSolutions:
-        face_mesh = None
-    mp_face = MockSolutions()
+from core.vision.landmarks import LandmarkService, eye_aspect_ratios
 
 def eye_aspect_ratio(eye):
     A = np.linalg.norm(eye[1] - eye[5])
@@ -17,42 +10,54 @@ def eye_aspect_ratio(eye):
     C = np.linalg.norm(eye[0] - eye[3])
     return (A + B) / (2.0 * C + 1e-6)
 
+class BlinkAnalyzer:
+    """Counts blinks from the eye aspect ratio of published landmarks."""
+
+    def __init__(self, landmarks=None):
+        """
+        Args:
+            landmarks: Shared LandmarkService feeding `update`. None creates a
+                       private one for standalone use through `process`.
+        """
+        if landmarks is None:
+            landmarks = LandmarkService()
+            landmarks.subscribe(self)
+        self.service = landmarks
+        self.blink_count = 0
+        self.ear_history = []
+
+    def process(self, frame, timestamp=None):
+        self.service.process(frame, timestamp)
+
+    def update(self, landmarks, frame=None, timestamp=None):
+        if landmarks is None:
+            return
+
+        ear = float(np.mean(eye_aspect_ratios(landmarks)))
+        self.ear_history.append(ear)
+
+        if len(self.ear_history) > 2 and self.ear_history[-2] > 0.25 and ear < 0.20:
+            self.blink_count += 1
+
+    def score(self):
+        blink_score = min(self.blink_count / 3, 1.0)
+        return float(blink_score)
+
 def get_vision_score(duration=10):
     cap = cv2.VideoCapture(0)
-    face_mesh = mp_face.FaceMesh(refine_landmarks=True)
-    blink_count = 0
-    ear_history = []
+    analyzer = BlinkAnalyzer()
     start = time.time()
 
     while time.time() - start < duration:
         ret, frame = cap.read()
         if not ret:
             continue
-
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = face_mesh.process(rgb)
-
-        if result.multi_face_landmarks:
-            landmarks = result.multi_face_landmarks[0].landmark
-            h, w, _ = frame.shape
-
-            left_eye_idx = [33, 160, 158, 133, 153, 144]
-            right_eye_idx = [362, 385, 387, 263, 373, 380]
-
-            left_eye = np.array([[landmarks[i].x * w, landmarks[i].y * h] for i in left_eye_idx])
-            right_eye = np.array([[landmarks[i].x * w, landmarks[i].y * h] for i in right_eye_idx])
-
-            ear = (eye_aspect_ratio(left_eye) + eye_aspect_ratio(right_eye)) / 2
-            ear_history.append(ear)
-
-            if len(ear_history) > 2 and ear_history[-2] > 0.25 and ear < 0.20:
-                blink_count += 1
+        analyzer.process(frame)
 
     cap.release()
     cv2.destroyAllWindows()
 
-    blink_score = min(blink_count / 3, 1.0)
-    return float(blink_score)
+    return analyzer.score()
 
 if __name__ == "__main__":
     print(get_vision_score())
\ No newline at end of file
@@ -0,0 +1,237 @@
+# challenge_engine.py
+"""Event-driven active challenges verified from per-frame face geometry."""
+
+import random
+
+import numpy as np
+
+from .liveness import ActiveChallengeResult
+
+# Prompt -> (challenge type, requested pattern). "Say hello" needs audio and
+# is not verifiable from frames.
+CHALLENGE_SPECS = {
+    "Blink twice": ("blink", "2"),
+    "Turn your head left": ("head_turn", "left"),
+    "Turn your head right": ("head_turn", "right"),
+    "Look up": ("head_tilt", "up"),
+    "Look down": ("head_tilt", "down"),
+}
+
+# FaceMesh indices used for the head pose proxies
+NOSE_TIP = 1
+LEFT_EYE_OUTER = 33
+RIGHT_EYE_OUTER = 263
+
+class ChallengeEngine:
+    def __init__(self, count=2, timeout=5.0, min_latency=0.2, start_delay=1.0, gap=1.0,
+                 turn_threshold=0.15, tilt_threshold=0.10, mirrored=False, kinds=None, rng=None):
+        """
+        Non-blocking challenge-response state machine.
+
+        Call `update` with every frame's timestamp and face box, plus the
+        landmarks while `needs_landmarks` is set. The engine issues a
+        prompt, verifies the response incrementally from the landmarks of
+        the frames that follow, and records an ActiveChallengeResult when
+        the response is seen or the prompt times out. Each update is a few
+        arithmetic operations, so it never blocks the caller.
+
+        Head movements are measured from the nose against the eye corners,
+        which moves when the head rotates but not when it slides across
+        the image. The face box alone cannot tell the two apart (and Haar
+        boxes are square, so their shape carries no rotation either): a
+        prompt whose frames come without landmarks times out as failed.
+
+        Args:
+            count: Challenges per session.
+            timeout: Seconds allowed to respond to a prompt.
+            min_latency: Responses faster than this (seconds) are treated as
+                         pre-recorded, not a reaction to the prompt.
+            start_delay: Seconds of tracked face before the first prompt.
+            gap: Seconds between a result and the next prompt.
+            turn_threshold: Yaw proxy change (nose offset from the eye
+                            midpoint, fraction of face width) that counts as
+                            a head turn.
+            tilt_threshold: Pitch proxy change (fraction of face height) that
+                            counts as looking up/down.
+            mirrored: True if frames are mirrored (selfie view). Otherwise the
+                      subject turning to their left moves toward image +x.
+            kinds: Challenge types to draw from ("blink", "head_turn",
+                   "head_tilt"); default all. Blinks also need the EAR
+                   passed to `update`.
+            rng: random.Random for prompt selection.
+        """
+        self.count = count
+        self.timeout = timeout
+        self.min_latency = min_latency
+        self.start_delay = start_delay
+        self.gap = gap
+        self.turn_threshold = turn_threshold
+        self.tilt_threshold = tilt_threshold
+        self.mirrored = mirrored
+        self.prompts = [p for p, (kind, _) in CHALLENGE_SPECS.items() if kinds is None or kind in kinds]
+        self.rng = rng or random.Random()
+        self.reset()
+
+    def reset(self):
+        self.results = []
+        self.prompt = None
+        self.prompt_time = None
+        self.baseline = None
+        self.pose = None
+        self.ready_time = None
+        self.blinks = 0
+        self.eye_closed = False
+        self.first_response = None
+
+    @property
+    def done(self):
+        return len(self.results) >= self.count
+
+    @property
+    def needs_landmarks(self):
+        """True while a prompt is active: every response is verified from landmarks."""
+        return self.prompt is not None
+
+    def update(self, timestamp, bbox, landmarks=None, ear=None):
+        """
+        Advance the state machine with one frame.
+
+        Args:
+            timestamp: Frame time in seconds.
+            bbox: (x, y, w, h) face box, or None if no face.
+            landmarks: (N, 2) FaceMesh landmarks in pixels, or None.
+            ear: Optional eye aspect ratio of the frame (blink challenges).
+
+        Returns:
+            dict: Challenge status for the client ('prompt', 'state',
+                  'remaining_s', and 'result' when one just completed), or
+                  None when no challenge is active.
+        """
+        if self.done:
+            return None
+        if bbox is None:
+            if self.prompt is None:
+                # Lost face before a prompt: the start clock restarts
+                self.ready_time = None
+                return None
+            # The active prompt keeps running and expires as usual. The pose
+            # restarts from wherever the face reappears, so leaving the view
+            # and coming back is not taken for a head movement.
+            self.pose = None
+            if timestamp - self.prompt_time < self.timeout:
+                return self._status(timestamp)
+            result = self._finish()
+            status = self._status(timestamp)
+            status["result"] = result.__dict__
+            return status
+
+        self._update_pose(bbox, landmarks)
+
+        if self.prompt is None:
+            if self.ready_time is None:
+                self.ready_time = timestamp + (self.start_delay if not self.results else self.gap)
+            if timestamp < self.ready_time:
+                return None
+            self._issue(timestamp)
+            return self._status(timestamp)
+
+        result = self._verify(timestamp, ear)
+        status = self._status(timestamp)
+        if result is not None:
+            status["result"] = result.__dict__
+        return status
+
+    def _issue(self, timestamp):
+        self.prompt = self.rng.choice(self.prompts)
+        self.prompt_time = timestamp
+        # Landmarks are only tracked during prompts: the baseline is the
+        # first pose measured after this one was issued
+        self.pose = None
+        self.baseline = None
+        self.blinks = 0
+        self.eye_closed = False
+        self.first_response = None
+
+    def _verify(self, timestamp, ear):
+        kind, pattern = CHALLENGE_SPECS[self.prompt]
+        elapsed = timestamp - self.prompt_time
+
+        detected = None
+        if kind == "blink":
+            if ear is not None:
+                # Same hysteresis as BlinkAnalyzer: open > 0.25, closed < 0.20
+                if not self.eye_closed and ear < 0.20:
+                    self.eye_closed = True
+                elif self.eye_closed and ear > 0.25:
+                    self.eye_closed = False
+                    self.blinks += 1
+                    if self.first_response is None:
+                        self.first_response = elapsed
+            if self.blinks >= int(pattern):
+                detected = str(self.blinks)
+        elif self.baseline is not None:
+            yaw, pitch = self.pose - self.baseline
+            if kind == "head_turn" and abs(yaw) >= self.turn_threshold:
+                detected = "left" if (yaw > 0) != self.mirrored else "right"
+            elif kind == "head_tilt" and abs(pitch) >= self.tilt_threshold:
+                detected = "down" if pitch > 0 else "up"
+            if detected is not None and self.first_response is None:
+                self.first_response = elapsed
+
+        if detected is None and elapsed < self.timeout:
+            return None
+        return self._finish(detected)
+
+    def _finish(self, detected=None):
+        """Record the result of the active prompt; `detected` None means it timed out."""
+        kind, pattern = CHALLENGE_SPECS[self.prompt]
+        if detected is None:
+            detected = str(self.blinks) if kind == "blink" else "none"
+        timing_ok = detected != "none" and self.first_response is not None \
+            and self.min_latency <= self.first_response <= self.timeout
+        geometry_ok = detected == pattern
+        score = 1.0 if timing_ok and geometry_ok else (0.5 if geometry_ok else 0.0)
+
+        result = ActiveChallengeResult(
+            challenge_type=kind,
+            requested_pattern=pattern,
+            detected_pattern=detected,
+            timing_ok=bool(timing_ok),
+            geometry_ok=bool(geometry_ok),
+            score=score
+        )
+        self.results.append(result)
+        self.prompt = None
+        self.ready_time = None
+        return result
+
+    def _status(self, timestamp):
+        return {
+            "prompt": self.prompt,
+            "state": "pending" if self.prompt is not None else "done",
+            "remaining_s": max(0.0, self.timeout - (timestamp - self.prompt_time)),
+            "completed": len(self.results),
+            "total": self.count
+        }
+
+    def _pose(self, bbox, landmarks):
+        """(yaw, pitch) proxies in face-size units: nose offset from the eye midpoint."""
+        _, _, w, h = bbox
+        left, right, nose = landmarks[LEFT_EYE_OUTER], landmarks[RIGHT_EYE_OUTER], landmarks[NOSE_TIP]
+        mid = (left + right) / 2
+        return np.array([(nose[0] - mid[0]) / max(w, 1), (nose[1] - mid[1]) / max(h, 1)])
+
+    def _update_pose(self, bbox, landmarks, alpha=0.5):
+        if landmarks is None:
+            # No rotation cue in this frame; keep the last pose
+            return
+        pose = self._pose(bbox, landmarks)
+        if self.pose is None:
+            # New prompt or face just reappeared: restart smoothing and
+            # measure the response from here
+            self.pose = pose
+            if self.prompt is not None:
+                self.baseline = pose
+        else:
+            # Light EMA against detector jitter
+            self.pose = alpha * pose + (1 - alpha) * self.pose
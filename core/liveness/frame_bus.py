@@ -0,0 +1,84 @@
+# frame_bus.py
+import queue
+import threading
+import time
+
+from core.vision.video_reader import VideoReader
+
+class FrameBus:
+    """
+    One camera capture shared by several frame analyzers.
+
+    A single capture thread reads the camera and fans every frame out to one
+    worker thread per analyzer, so all checks see the same frames at the same
+    time instead of each opening the camera for its own run. Each worker has
+    a small queue; an analyzer that falls behind skips to the newest frames
+    rather than delaying the others.
+    """
+
+    def __init__(self, source=0, queue_size=2):
+        self.source = source
+        self.queue_size = queue_size
+        self.consumers = []
+
+    def subscribe(self, analyzer, duration):
+        """
+        Feed `analyzer.process(frame, timestamp)` for `duration` seconds.
+
+        Frames are shared between analyzers and must not be modified.
+        """
+        self.consumers.append((analyzer, duration, queue.Queue(maxsize=self.queue_size)))
+
+    def run(self):
+        """Capture until the longest subscription ends and wait for the analyzers."""
+        workers = [
+            threading.Thread(target=self._consume, args=(analyzer, frames), daemon=True)
+            for analyzer, _, frames in self.consumers
+        ]
+        for worker in workers:
+            worker.start()
+
+        open_queues = {id(frames): (duration, frames) for _, duration, frames in self.consumers}
+        reader = None
+        try:
+            reader = VideoReader(self.source, target_fps=None, realtime=False)
+            start = time.time()
+            for frame, timestamp in reader:
+                elapsed = time.time() - start
+                for key, (duration, frames) in list(open_queues.items()):
+                    if elapsed < duration:
+                        self._offer(frames, (frame, timestamp))
+                    else:
+                        # Subscription over: let the analyzer finish right away
+                        self._offer(frames, None)
+                        del open_queues[key]
+                if not open_queues:
+                    break
+        finally:
+            if reader is not None:
+                reader.release()
+            for _, frames in open_queues.values():
+                self._offer(frames, None) # End of stream
+            for worker in workers:
+                worker.join()
+
+    @staticmethod
+    def _offer(frames, item):
+        # Newest frame wins: drop the oldest queued one when the analyzer lags
+        while True:
+            try:
+                frames.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    pass
+
+    @staticmethod
+    def _consume(analyzer, frames):
+        while True:
+            item = frames.get()
+            if item is None:
+                return
+            analyzer.process(*item)
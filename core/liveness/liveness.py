@@ -30,6 +30,31 @@ class LivenessResult:
     reasons: List[str]
     debug: Dict[str, Any]
 
+def physio_features_from_rois(roi_features: Dict[str, Dict[str, float]], correlations: np.ndarray) -> PhysioFeatures:
+    """
+    Aggregate per-ROI rPPG features into session-level PhysioFeatures.
+
+    Args:
+        roi_features: Feature dict per ROI (keys as FeatureExtractor.extract).
+        correlations: (R, R) cross-ROI correlation matrix, NaN for flat signals.
+    """
+    bpms = [f["hr_bpm"] for f in roi_features.values() if f["hr_bpm"] > 0]
+    snrs = [f["snr"] for f in roi_features.values()]
+    ibi_cvs = [f["ibi_cv"] for f in roi_features.values()]
+
+    pair_corr = np.asarray(correlations)[np.triu_indices(len(roi_features), k=1)]
+    pair_corr = pair_corr[~np.isnan(pair_corr)]
+
+    return PhysioFeatures(
+        bpm_mean=float(np.mean(bpms)) if bpms else 0.0,
+        bpm_std=float(np.std(bpms)) if bpms else 0.0,
+        snr_mean=float(np.mean(snrs)) if snrs else 0.0,
+        snr_std=float(np.std(snrs)) if snrs else 0.0,
+        cross_roi_corr_mean=float(np.mean(pair_corr)) if pair_corr.size else 0.0,
+        ibi_cv=float(np.mean(ibi_cvs)) if ibi_cvs else 0.0,
+        roi_features=roi_features
+    )
+
 def score_physiological_liveness(features: PhysioFeatures) -> tuple[float, List[str]]:
     reasons = []
     score = 0.5
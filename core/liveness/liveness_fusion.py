@@ -1,20 +1,66 @@
 # liveness_fusion.py
-from .blink_detector import get_vision_score
-from .pulse_liveness import get_pulse_score
+from concurrent.futures import ThreadPoolExecutor
+
+from core.vision.landmarks import LandmarkService
+from .frame_bus import FrameBus
+from .blink_detector import BlinkAnalyzer
+from .motion_validator import MotionAnalyzer
+from .pulse_liveness import PulseAnalyzer
 from .audio_liveness import get_audio_score
 from .behavior_liveness import get_behavior_score
 
-def run_liveness():
-    vision_score = get_vision_score()
-    pulse_score = get_pulse_score()
-    audio_score = get_audio_score()
-    behavior_score = get_behavior_score()
+# Capture time of each video check (seconds), as in the standalone checks
+VISION_DURATION = 10
+PULSE_DURATION = 15
+MOTION_DURATION = 5
+
+def collect_scores(source=0, mesh_every=1):
+    """
+    Run all liveness checks concurrently.
+
+    One capture thread feeds the blink, motion and pulse analyzers from the
+    same camera stream while audio is recorded in the background and the
+    behavior prompts run on the calling thread, so the checks take about as
+    long as the longest one instead of their sum. FaceMesh runs once per
+    frame (or every `mesh_every` frames) for all three analyzers.
+
+    Returns:
+        dict: Score per check ('vision', 'pulse', 'motion', 'audio', 'behavior').
+    """
+    landmarks = LandmarkService(every=mesh_every)
+    blink = BlinkAnalyzer(landmarks)
+    motion = MotionAnalyzer(landmarks)
+    pulse = PulseAnalyzer()
+    landmarks.subscribe(blink, VISION_DURATION)
+    landmarks.subscribe(motion, MOTION_DURATION)
+    landmarks.subscribe(pulse, PULSE_DURATION)
+
+    bus = FrameBus(source)
+    bus.subscribe(landmarks, max(VISION_DURATION, MOTION_DURATION, PULSE_DURATION))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        video = pool.submit(bus.run)
+        audio = pool.submit(get_audio_score)
+        behavior_score = get_behavior_score()
+        video.result()
+        audio_score = audio.result()
+
+    return {
+        "vision": blink.score(),
+        "pulse": pulse.score(),
+        "motion": motion.score(),
+        "audio": audio_score,
+        "behavior": behavior_score
+    }
+
+def run_liveness(source=0):
+    scores = collect_scores(source)
 
     liveness_score = (
-        0.35 * vision_score +
-        0.30 * pulse_score +
-        0.20 * audio_score +
-        0.15 * behavior_score
+        0.35 * scores["vision"] +
+        0.30 * scores["pulse"] +
+        0.20 * scores["audio"] +
+        0.15 * scores["behavior"]
     )
 
     if liveness_score >= 0.8:
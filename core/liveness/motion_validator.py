@@ -3,6 +3,7 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import time
+from core.vision.landmarks import LandmarkService, NOSE_TIP
 
 try:
     mp_face = mp.solutions.face_mesh
@@ -13,45 +14,63 @@ except AttributeError:
     mp_face = MockSolutions()
     print("Warning: mediapipe.solutions not found. Motion validation will be disabled.")
 
+class MotionAnalyzer:
+    """Tracks nose movement between published landmarks."""
+
+    def __init__(self, landmarks=None):
+        """
+        Args:
+            landmarks: Shared LandmarkService feeding `update`. None creates a
+                       private one for standalone use through `process`.
+        """
+        if landmarks is None:
+            landmarks = LandmarkService()
+            landmarks.subscribe(self)
+        self.service = landmarks
+        self.movements = []
+        self.last_pos = None
+
+    def process(self, frame, timestamp=None):
+        self.service.process(frame, timestamp)
+
+    def update(self, landmarks, frame=None, timestamp=None):
+        if landmarks is None:
+            return
+
+        nose = landmarks[NOSE_TIP]
+        if self.last_pos is not None:
+            movement = np.linalg.norm(nose - self.last_pos)
+            self.movements.append(movement)
+
+        self.last_pos = nose
+
+    def score(self):
+        avg_motion = np.mean(self.movements) if self.movements else 0
+
+        if avg_motion > 5:
+            return 1.0
+        elif avg_motion > 2:
+            return 0.6
+        else:
+            return 0.0
+
 def validate_motion(duration=5):
     if mp_face.face_mesh is None:
         return 0.0
         
     cap = cv2.VideoCapture(0)
-    face_mesh = mp_face.FaceMesh(refine_landmarks=True)
-    movements = []
-    last_pos = None
+    analyzer = MotionAnalyzer()
     start = time.time()
 
     while time.time() - start < duration:
         ret, frame = cap.read()
         if not ret:
             continue
-
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = face_mesh.process(rgb)
-
-        if result.multi_face_landmarks:
-            lm = result.multi_face_landmarks[0].landmark
-            h, w, _ = frame.shape
-            nose = np.array([lm[1].x * w, lm[1].y * h])
-
-            if last_pos is not None:
-                movement = np.linalg.norm(nose - last_pos)
-                movements.append(movement)
-
-            last_pos = nose
+        analyzer.process(frame)
 
     cap.release()
 
-    avg_motion = np.mean(movements) if movements else 0
-
-    if avg_motion > 5:
-        return 1.0
-    elif avg_motion > 2:
-        return 0.6
-    else:
-        return 0.0
+    return analyzer.score()
 
 if __name__ == "__main__":
     print(validate_motion())
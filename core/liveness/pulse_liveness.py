@@ -3,31 +3,49 @@ import cv2
 import numpy as np
 from scipy.signal import butter, filtfilt, find_peaks
 import time
+from core.rppg.resample import resample_uniform
+from core.vision.landmarks import roi_means
 
 def bandpass(signal, fs):
     b, a = butter(3, [0.8 / (fs / 2), 2.0 / (fs / 2)], btype='band')
     return filtfilt(b, a, signal)
 
-def get_pulse_score(duration=15, fs=30):
-    cap = cv2.VideoCapture(0)
-    signals = []
-    start = time.time()
+class PulseAnalyzer:
+    """Green-channel pulse of the frame center, from frames fed one at a time."""
 
-    while time.time() - start < duration:
-        ret, frame = cap.read()
-        if not ret:
-            continue
+    def __init__(self, fs=30):
+        self.fs = fs
+        self.signals = []
+        self.timestamps = []
 
+    def process(self, frame, timestamp=None):
         h, w, _ = frame.shape
         roi = frame[int(h*0.3):int(h*0.6), int(w*0.3):int(w*0.6)]
         mean_rgb = np.mean(roi.reshape(-1, 3), axis=0)
-        signals.append(mean_rgb)
+        self.signals.append(mean_rgb)
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
 
-        time.sleep(1 / fs)
+    def update(self, landmarks, frame, timestamp=None):
+        """Landmark consumer: average the landmark-anchored skin patches instead of the frame center."""
+        if landmarks is None:
+            return
+        means = roi_means(frame, landmarks)
+        if means is None:
+            return
+        self.signals.append(means.mean(axis=0))
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
 
-    cap.release()
+    def score(self):
+        # Frames come at the camera rate; resample onto the `fs` grid first
+        if len(self.signals) < 2:
+            return 0.0
+        _, signals = resample_uniform(self.timestamps, np.array(self.signals), self.fs)
+        duration = len(signals) / self.fs
+        if len(signals) <= 21: # Shorter than the filtfilt padding
+            return 0.0
+        return pulse_score_from_signals(signals, self.fs, duration)
 
-    signals = np.array(signals)
+def pulse_score_from_signals(signals, fs, duration):
     green_signal = signals[:, 1]
     filtered = bandpass(green_signal, fs)
     peaks, _ = find_peaks(filtered, distance=fs*0.5)
@@ -43,5 +61,20 @@ def get_pulse_score(duration=15, fs=30):
 
     return float(np.clip(pulse_score, 0, 1))
 
+def get_pulse_score(duration=15, fs=30):
+    cap = cv2.VideoCapture(0)
+    analyzer = PulseAnalyzer(fs=fs)
+    start = time.time()
+
+    while time.time() - start < duration:
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        analyzer.process(frame)
+
+    cap.release()
+
+    return analyzer.score()
+
 if __name__ == "__main__":
     print(get_pulse_score())
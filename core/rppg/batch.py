@@ -0,0 +1,34 @@
+"""Batched rPPG analysis over the windows of many sessions."""
+
+import numpy as np
+from .features import correlation_matrix
+
+class BatchAnalyzer:
+    def __init__(self):
+        """
+        Read out the analyses of many streaming sessions at once.
+
+        The signal stages themselves (streaming POS, causal bandpass, feature
+        tracking) stay per session in RPPGStream, so a batched verdict is
+        the same as the one the session would compute on its own; what is
+        batched is the per-window readout, with the cross-ROI correlations
+        of all sessions in one matrix product.
+        """
+
+    def analyze(self, streams):
+        """
+        Analyze streams advanced up to their newest sample.
+
+        Args:
+            streams: RPPGStream objects with the same number of ROIs and
+                     filtered samples.
+
+        Returns:
+            tuple: (features, correlations) where features maps each feature
+                   key to an (S, R) array and correlations is (S, R, R).
+        """
+        filtered = np.stack([stream.filtered.view() for stream in streams]) # (S, R, N)
+        correlations = correlation_matrix(filtered)
+        tracked = [stream.features.features() for stream in streams]
+        features = {key: np.stack([values[key] for values in tracked]) for key in tracked[0]}
+        return features, correlations
@@ -0,0 +1,67 @@
+"""Fixed-size sample buffers for real-time sessions."""
+
+import numpy as np
+
+class RingBuffer:
+    def __init__(self, rows, capacity, channels=None, dtype=np.float32):
+        """
+        Preallocated buffer holding the last `capacity` samples of `rows` traces.
+
+        Storage is twice the capacity so that the most recent window is always
+        contiguous: reads are zero-copy views and pushes are amortized O(1)
+        (the tail is moved to the front once every `capacity` pushes).
+
+        Args:
+            rows: Number of parallel traces (e.g. one per ROI).
+            capacity: Number of samples kept per trace.
+            channels: Values per sample (e.g. 3 for BGR means), or None for scalars.
+            dtype: Storage dtype.
+        """
+        self.rows = rows
+        self.capacity = capacity
+        self.channels = channels
+        shape = (rows, 2 * capacity) + ((channels,) if channels else ())
+        self._data = np.zeros(shape, dtype=dtype)
+        self._end = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def full(self):
+        return self._len == self.capacity
+
+    def push(self, sample):
+        """
+        Append one sample to every trace.
+
+        Args:
+            sample: (rows,) or (rows, channels) array.
+        """
+        if self._end == self._data.shape[1]:
+            keep = self.capacity - 1
+            self._data[:, :keep] = self._data[:, self._end - keep:self._end]
+            self._end = keep
+        self._data[:, self._end] = sample
+        self._end += 1
+        self._len = min(self._len + 1, self.capacity)
+
+    def view(self, n=None):
+        """
+        Most recent samples, oldest first.
+
+        Args:
+            n: Number of samples to return (default: all buffered samples).
+
+        Returns:
+            np.array: (rows, n) or (rows, n, channels) view into the buffer.
+                      It is only valid until the next `push`.
+        """
+        n = self._len if n is None else min(n, self._len)
+        return self._data[:, self._end - n:self._end]
+
+    def clear(self):
+        self._data[:] = 0
+        self._end = 0
+        self._len = 0
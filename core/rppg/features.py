@@ -1,7 +1,55 @@
 """Feature extraction from rPPG signal."""
 
+from collections import deque
 import numpy as np
+from scipy.fft import next_fast_len, rfft, irfft
 from scipy.signal import welch, find_peaks
+from .buffers import RingBuffer
+
+FEATURE_KEYS = ("snr", "hr_bpm", "periodicity", "ibi_mean", "ibi_std", "ibi_cv")
+
+def _feature_dict(values, shape):
+    """Pack per-trace feature arrays; plain floats for a single 1D signal."""
+    if shape == ():
+        return {key: float(values[key]) for key in FEATURE_KEYS}
+    return {key: np.broadcast_to(np.asarray(values[key], dtype=float), shape).copy() for key in FEATURE_KEYS}
+
+def feature_rows(features):
+    """Split stacked features (dict of (R,) arrays) into one dict of floats per row."""
+    rows = len(features[FEATURE_KEYS[0]])
+    return [{key: float(features[key][i]) for key in FEATURE_KEYS} for i in range(rows)]
+
+def _ibi_stats(peaks, fs):
+    """Inter-beat interval mean, std and coefficient of variation from peak indices."""
+    ibi_mean = 0.0
+    ibi_std = 0.0
+    ibi_cv = 0.0
+
+    if len(peaks) > 1:
+        ibis = np.diff(peaks) / fs # in seconds
+        ibi_mean = np.mean(ibis)
+        if len(ibis) > 1:
+            ibi_std = np.std(ibis)
+            if ibi_mean > 0:
+                ibi_cv = ibi_std / ibi_mean
+
+    return ibi_mean, ibi_std, ibi_cv
+
+def correlation_matrix(signals):
+    """
+    Pairwise Pearson correlation of stacked signals in one matrix product.
+
+    Args:
+        signals: (..., R, N) array, e.g. the filtered signals of all ROIs.
+
+    Returns:
+        np.array: (..., R, R) correlations. Rows/columns of flat signals are NaN.
+    """
+    signals = np.asarray(signals, dtype=float)
+    centered = signals - np.mean(signals, axis=-1, keepdims=True)
+    std = np.std(centered, axis=-1, keepdims=True)
+    z = np.divide(centered, std, out=np.full_like(centered, np.nan), where=std > 0)
+    return z @ np.swapaxes(z, -1, -2) / signals.shape[-1]
 
 class FeatureExtractor:
     def __init__(self, fs=30):
@@ -12,52 +60,55 @@ class FeatureExtractor:
         Extract SNR, heart rate, periodicity features.
         
         Args:
-            signal: 1D numpy array of rPPG signal
+            signal: 1D numpy array of rPPG signal, or stacked signals (..., N)
+                    (e.g. one row per ROI) analyzed in single vectorized calls.
             
         Returns:
-            dict: Dictionary containing 'snr', 'hr_bpm', 'periodicity'
+            dict: Dictionary containing 'snr', 'hr_bpm', 'periodicity' and
+                  'ibi_mean', 'ibi_std', 'ibi_cv'. Values are floats for a 1D
+                  signal and arrays of shape (...) for stacked signals.
         """
-        if len(signal) < self.fs: # Need at least 1 second
-            return {"snr": 0.0, "hr_bpm": 0.0, "periodicity": 0.0}
+        signal = np.asarray(signal, dtype=float)
+        shape = signal.shape[:-1]
+        n = signal.shape[-1]
+        zeros = {key: 0.0 for key in FEATURE_KEYS}
+
+        if n < self.fs: # Need at least 1 second
+            return _feature_dict(zeros, shape)
 
         # Power Spectral Density
         # nperseg should be enough to cover the signal or a window
-        nperseg = min(len(signal), 256)
-        freqs, psd = welch(signal, self.fs, nperseg=nperseg)
+        nperseg = min(n, 256)
+        freqs, psd = welch(signal, self.fs, nperseg=nperseg, axis=-1)
         
         # Find peak frequency in valid range [0.7, 3.0] Hz (42-180 BPM)
         valid_mask = (freqs >= 0.7) & (freqs <= 3.0)
         valid_freqs = freqs[valid_mask]
-        valid_psd = psd[valid_mask]
+        valid_psd = psd[..., valid_mask]
         
-        if len(valid_psd) == 0:
-            return {"snr": 0.0, "hr_bpm": 0.0, "periodicity": 0.0}
+        if len(valid_freqs) == 0:
+            return _feature_dict(zeros, shape)
             
-        peak_idx = np.argmax(valid_psd)
+        peak_idx = np.argmax(valid_psd, axis=-1)
         peak_freq = valid_freqs[peak_idx]
-        peak_power = valid_psd[peak_idx]
+        peak_power = np.take_along_axis(valid_psd, peak_idx[..., np.newaxis], axis=-1)[..., 0]
         
-        # SNR: Peak power / (Total power - Peak power)
-        # We calculate noise power as the average power of non-peak frequencies in the valid range
-        # or just ratio of peak to everything else.
-        
-        # Let's define SNR as Peak Power / Median Power of the spectrum (in valid range)
+        # SNR: Peak Power / Median Power of the spectrum (in valid range)
         # This is robust to other peaks.
-        median_power = np.median(valid_psd)
-        if median_power > 0:
-            snr = peak_power / median_power
-        else:
-            snr = 0.0
+        median_power = np.median(valid_psd, axis=-1)
+        snr = np.divide(peak_power, median_power, out=np.zeros_like(peak_power), where=median_power > 0)
             
         # Periodicity: We can use the max autocorrelation value
         # Normalize signal
-        norm_signal = (signal - np.mean(signal))
-        if np.std(norm_signal) > 0:
-            norm_signal = norm_signal / np.std(norm_signal)
+        norm_signal = signal - np.mean(signal, axis=-1, keepdims=True)
+        std = np.std(norm_signal, axis=-1, keepdims=True)
+        norm_signal = np.divide(norm_signal, std, out=norm_signal, where=std > 0)
             
-        # Autocorrelation
-        corr = np.correlate(norm_signal, norm_signal, mode='full')
-        corr = corr[len(corr)//2:]
+        # Autocorrelation via FFT (zero-padded to avoid circular wrap-around),
+        # O(N log N) instead of the O(N^2) direct correlation
+        nfft = next_fast_len(2 * n - 1)
+        spectrum = rfft(norm_signal, nfft, axis=-1)
+        corr = irfft(np.abs(spectrum) ** 2, nfft, axis=-1)[..., :n]
         
         # Find peaks in autocorrelation
         # We expect a peak at lag corresponding to heart rate
@@ -65,34 +116,185 @@ class FeatureExtractor:
         min_lag = int(self.fs / 3.0)
         max_lag = int(self.fs / 0.7)
         
-        periodicity = 0.0
-        if len(corr) > max_lag:
-            roi_corr = corr[min_lag:max_lag]
-            if len(roi_corr) > 0:
-                periodicity = np.max(roi_corr) / len(signal) # Normalize by length
+        periodicity = np.zeros(shape)
+        if n > max_lag:
+            periodicity = np.max(corr[..., min_lag:max_lag], axis=-1) / n # Normalize by length
         
         # IBI / Temporal Stability
         # Find peaks in the time domain signal
         # Use distance corresponding to max HR (3.0 Hz -> 0.33s -> fs*0.33 samples)
-        peaks, _ = find_peaks(signal, distance=int(self.fs/3.0))
-        
-        ibi_mean = 0.0
-        ibi_std = 0.0
-        ibi_cv = 0.0
-        
-        if len(peaks) > 1:
-            ibis = np.diff(peaks) / self.fs # in seconds
-            ibi_mean = np.mean(ibis)
-            if len(ibis) > 1:
-                ibi_std = np.std(ibis)
-                if ibi_mean > 0:
-                    ibi_cv = ibi_std / ibi_mean
+        rows = signal.reshape(-1, n)
+        ibi = np.array([
+            _ibi_stats(find_peaks(row, distance=int(self.fs/3.0))[0], self.fs) for row in rows
+        ]).reshape(shape + (3,))
         
-        return {
-            "snr": float(snr),
-            "hr_bpm": float(peak_freq * 60),
-            "periodicity": float(periodicity),
-            "ibi_mean": float(ibi_mean),
-            "ibi_std": float(ibi_std),
-            "ibi_cv": float(ibi_cv)
-        }
+        return _feature_dict({
+            "snr": snr,
+            "hr_bpm": peak_freq * 60,
+            "periodicity": periodicity,
+            "ibi_mean": ibi[..., 0],
+            "ibi_std": ibi[..., 1],
+            "ibi_cv": ibi[..., 2]
+        }, shape)
+
+class FeatureTracker:
+    def __init__(self, fs=30, window=256, rows=None):
+        """
+        Incremental counterpart of FeatureExtractor for streaming signals.
+
+        Keeps running state so that each new sample updates the features in
+        constant time instead of re-analyzing the whole buffer:
+        - a sliding DFT limited to the 0.7-3.0 Hz bins (Hann-windowed in the
+          frequency domain) for SNR and heart rate,
+        - running autocorrelation sums at the candidate heart-rate lags,
+        - an online peak detector for the inter-beat intervals.
+
+        Args:
+            fs: Sampling rate (Hz).
+            window: Number of most recent samples the features describe.
+            rows: Number of signals tracked together (e.g. one per ROI), fed as
+                  (rows,) samples. None tracks a single scalar signal.
+        """
+        self.fs = fs
+        self.window = window
+        self.rows = rows
+
+        # Lag range for 0.7-3.0 Hz: fs/3.0 to fs/0.7 (same as FeatureExtractor)
+        self.min_lag = int(fs / 3.0)
+        self.max_lag = int(fs / 0.7)
+        self.lags = np.arange(self.min_lag, self.max_lag)
+
+        # DFT bins in [0.7, 3.0] Hz, plus one neighbour on each side for the Hann window
+        freqs = np.arange(window // 2 + 1) * fs / window
+        band = np.flatnonzero((freqs >= 0.7) & (freqs <= 3.0))
+        self._band_freqs = freqs[band]
+        self._bins = np.arange(band[0] - 1, band[-1] + 2)
+        self._twiddle = np.exp(2j * np.pi * self._bins / window)
+
+        self.peak_distance = int(fs / 3.0)
+        self.reset()
+
+    def reset(self):
+        """Clear the running state."""
+        rows = self.rows or 1
+        self._history = RingBuffer(rows, self.window + 1, dtype=np.float64)
+        self._count = 0
+        self._dft = np.zeros((rows, len(self._bins)), dtype=complex)
+        self._acf = np.zeros((rows, len(self.lags)))
+        self._sum = np.zeros(rows)
+        self._sum_sq = np.zeros(rows)
+        self._peaks = [deque() for _ in range(rows)] # (sample index, value) per row
+
+    def update(self, samples):
+        """
+        Push new samples of the (filtered) rPPG signal.
+
+        Args:
+            samples: Scalar or 1D array of new samples, oldest first. When
+                     tracking several signals: (rows,) or (rows, k) samples.
+        """
+        samples = np.asarray(samples, dtype=float).reshape(self.rows or 1, -1)
+        for j in range(samples.shape[1]):
+            self._push(samples[:, j])
+
+    def _push(self, x):
+        self._history.push(x)
+        self._count += 1
+        hist = self._history.view() # (rows, up to window + 1), newest last
+
+        # Samples leaving the window (zero while the window is filling up)
+        full = hist.shape[1] > self.window
+        leaving = hist[:, 0] if full else np.zeros_like(x)
+
+        # Sliding DFT: X_k <- (X_k + x_new - x_old) * e^(j*2*pi*k/N)
+        self._dft = (self._dft + (x - leaving)[:, np.newaxis]) * self._twiddle
+
+        # Running sums over the window
+        self._sum += x - leaving
+        self._sum_sq += x * x - leaving * leaving
+
+        # Running autocorrelation: add the pairs ending at the new sample,
+        # drop the pairs starting at the sample that left the window.
+        valid = self.lags < hist.shape[1]
+        self._acf[:, valid] += x[:, np.newaxis] * hist[:, -1 - self.lags[valid]]
+        if full:
+            self._acf -= leaving[:, np.newaxis] * hist[:, self.lags]
+
+        self._track_peaks(hist)
+
+        # Running sums drift with rounding errors; resync once per window
+        if self._count % self.window == 0:
+            self._resync()
+
+    def _track_peaks(self, hist):
+        # The previous sample is a peak if it rises above its left neighbour
+        # and is not below the new sample.
+        index = self._count - 2
+        if hist.shape[1] >= 3:
+            is_peak = (hist[:, -3] < hist[:, -2]) & (hist[:, -2] >= hist[:, -1])
+            for row in np.flatnonzero(is_peak):
+                peaks, value = self._peaks[row], hist[row, -2]
+                if peaks and index - peaks[-1][0] < self.peak_distance:
+                    # Too close to the previous peak: keep the higher one
+                    if value > peaks[-1][1]:
+                        peaks[-1] = (index, value)
+                else:
+                    peaks.append((index, value))
+
+        # Forget peaks that left the window
+        oldest = self._count - self.window
+        for peaks in self._peaks:
+            while peaks and peaks[0][0] < oldest:
+                peaks.popleft()
+
+    def _resync(self):
+        window = self._history.view(self.window)
+        m = np.arange(self.window)
+        basis = np.exp(-2j * np.pi * np.outer(self._bins, m) / self.window)
+        self._dft = window @ basis.T
+        self._sum = np.sum(window, axis=1)
+        self._sum_sq = np.sum(window * window, axis=1)
+        self._acf = np.stack([np.sum(window[:, lag:] * window[:, :-lag], axis=1) for lag in self.lags], axis=1)
+
+    def features(self):
+        """
+        Current features of the last `window` samples.
+
+        Returns:
+            dict: Same keys as FeatureExtractor.extract ('snr', 'hr_bpm',
+                  'periodicity', 'ibi_mean', 'ibi_std', 'ibi_cv'); floats, or
+                  (rows,) arrays when tracking several signals.
+        """
+        shape = (self.rows,) if self.rows else ()
+        n = min(self._count, self.window)
+        if n < self.fs: # Need at least 1 second
+            return _feature_dict({key: 0.0 for key in FEATURE_KEYS}, shape)
+
+        # Hann window applied in the frequency domain: 0.5 X[k] - 0.25 (X[k-1] + X[k+1])
+        hann = 0.5 * self._dft[:, 1:-1] - 0.25 * (self._dft[:, :-2] + self._dft[:, 2:])
+        psd = np.abs(hann) ** 2
+
+        peak_idx = np.argmax(psd, axis=1)
+        peak_freq = self._band_freqs[peak_idx]
+        peak_power = psd[np.arange(len(psd)), peak_idx]
+        median_power = np.median(psd, axis=1)
+        snr = np.divide(peak_power, median_power, out=np.zeros_like(peak_power), where=median_power > 0)
+
+        # Periodicity: max normalized autocorrelation in the heart-rate lag range
+        periodicity = np.zeros(len(psd))
+        mean = self._sum / n
+        var = self._sum_sq / n - mean * mean
+        if n > self.max_lag:
+            acf = self._acf - np.outer(mean * mean, n - self.lags)
+            periodicity = np.divide(np.max(acf, axis=1), var * n, out=periodicity, where=var > 0)
+
+        ibi = np.array([_ibi_stats([index for index, _ in peaks], self.fs) for peaks in self._peaks])
+
+        return _feature_dict({
+            "snr": snr.reshape(shape),
+            "hr_bpm": (peak_freq * 60).reshape(shape),
+            "periodicity": periodicity.reshape(shape),
+            "ibi_mean": ibi[:, 0].reshape(shape),
+            "ibi_std": ibi[:, 1].reshape(shape),
+            "ibi_cv": ibi[:, 2].reshape(shape)
+        }, shape)
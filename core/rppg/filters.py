@@ -1,29 +1,79 @@
 """Signal filtering - bandpass, detrending."""
 
+from functools import lru_cache
 import numpy as np
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter, sosfilt, sosfilt_zi, sosfiltfilt
+
+@lru_cache(maxsize=32)
+def _design_sos(fs, low, high, order=3):
+    """Butterworth bandpass in second-order sections, or None for an invalid band."""
+    nyquist = 0.5 * fs
+    low = low / nyquist
+    high = high / nyquist
+
+    # Ensure valid bounds
+    low = max(0.01, min(low, 0.99))
+    high = max(0.01, min(high, 0.99))
+
+    if low >= high:
+        return None
+
+    return butter(order, [low, high], btype='band', output='sos')
 
 class BandpassFilter:
     def __init__(self, low=0.7, high=3.0, fs=30):
         self.low = low
         self.high = high
         self.fs = fs
-        
-    def apply(self, signal):
-        """Apply bandpass filter to rPPG signal."""
-        if len(signal) == 0:
+        self.reset()
+
+    @property
+    def sos(self):
+        # Designed once per (fs, low, high) and shared by all filter instances
+        return _design_sos(self.fs, self.low, self.high)
+
+    def apply(self, signal, axis=-1):
+        """
+        Apply bandpass filter to rPPG signal.
+
+        Batch mode for offline use: zero-phase filtering over the whole signal.
+        """
+        if np.shape(signal)[axis] == 0:
             return signal
-            
-        nyquist = 0.5 * self.fs
-        low = self.low / nyquist
-        high = self.high / nyquist
-        
-        # Ensure valid bounds
-        low = max(0.01, min(low, 0.99))
-        high = max(0.01, min(high, 0.99))
-        
-        if low >= high:
+
+        sos = self.sos
+        if sos is None:
             return signal
-            
-        b, a = butter(3, [low, high], btype='band')
-        return filtfilt(b, a, signal)
+
+        return sosfiltfilt(sos, signal, axis=axis)
+
+    def reset(self):
+        """Clear the streaming filter state."""
+        self._zi = None
+
+    def update(self, samples):
+        """
+        Streaming mode: causally filter new samples, keeping state between calls.
+
+        Each sample costs O(1) regardless of how much signal came before.
+
+        Args:
+            samples: New samples, time along the last axis. Leading axes are
+                     independent traces (e.g. (ROIs, k)) filtered in one call.
+
+        Returns:
+            np.array: Filtered samples, same shape as the input.
+        """
+        x = np.asarray(samples, dtype=float)
+        sos = self.sos
+        if sos is None or x.shape[-1] == 0:
+            return x
+
+        if self._zi is None:
+            # Start from the steady state for the first sample to avoid a step transient
+            x0 = x[..., 0]
+            zi = sosfilt_zi(sos).reshape((len(sos),) + (1,) * x0.ndim + (2,))
+            self._zi = zi * x0[np.newaxis, ..., np.newaxis]
+
+        y, self._zi = sosfilt(sos, x, axis=-1, zi=self._zi)
+        return y
@@ -1,41 +1,57 @@
+import time
 import numpy as np
 import cv2
 from core.vision.video_reader import VideoReader
 from core.vision.face_tracker import FaceTracker
-from core.vision.roi_tracker import ROITracker
+from core.vision.roi_engine import ROIEngine
 from core.rppg.signal_extractor import SignalExtractor
+from core.rppg.stream import RPPGStream
+from core.rppg.scheduler import AnalysisScheduler
+from core.rppg.resample import UniformResampler, resample_uniform
 from core.rppg.filters import BandpassFilter
-from core.rppg.features import FeatureExtractor
+from core.rppg.features import FeatureExtractor, correlation_matrix, feature_rows
 from core.rppg.quality_metrics import QualityAnalyzer
 
 class RPPGProcessor:
-    def __init__(self, fs=30, method='pos', buffer_size=300):
+    def __init__(self, fs=30, method='pos', buffer_size=300, hop_frames=10, hop_ms=None,
+                 roi_grid=(3, 3), skin_roi=True, max_gap=1.0, detect_every=10):
         self.fs = fs
         self.method = method
         self.buffer_size = buffer_size
-        self.face_tracker = FaceTracker()
-        self.roi_tracker = ROITracker()
-        self.signal_extractor = SignalExtractor()
+        # Face detection every `detect_every` frames, optical flow in between
+        self.face_tracker = FaceTracker(detect_every=detect_every)
+        # Forehead/cheek regions plus a dense grid and a skin-mask ROI
+        self.roi_engine = ROIEngine(grid=roi_grid, skin_mask=skin_roi)
+        self.signal_extractor = SignalExtractor(fs=fs, buffer_size=buffer_size)
         self.filter = BandpassFilter(fs=fs)
         self.feature_extractor = FeatureExtractor(fs=fs)
         self.quality_analyzer = QualityAnalyzer()
         
-        # State for real-time processing
-        self.buffers = {
-            "forehead": [],
-            "left_cheek": [],
-            "right_cheek": []
-        }
+        # State for real-time processing: per-ROI mean colors and streaming stages
+        self.roi_names = self.roi_engine.names
+        self.stream = RPPGStream(len(self.roi_names), fs=fs, buffer_size=buffer_size, method=method)
+        # Frames arrive at whatever rate the source delivers; the stream sees a uniform `fs` grid
+        self.resampler = UniformResampler(fs=fs)
+        # Longer gaps (seconds) restart the signal instead of being interpolated over
+        self.max_gap = max_gap
+        # Full analysis once per hop; the cached verdict is served in between
+        self.scheduler = AnalysisScheduler(hop_frames=hop_frames, hop_ms=hop_ms)
+        self.last_analysis = None
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, timestamp=None):
         """
         Process a single frame for real-time analysis.
         
         Args:
             frame: Input video frame.
+            timestamp: Capture time in seconds (optional, defaults to arrival
+                       time). Used to resample the traces onto the `fs` grid,
+                       so dropped or irregular frames don't skew the BPM.
             
         Returns:
             dict: Current analysis results (bbox, liveness, features).
+                  Between analysis hops the last verdict is repeated, with
+                  'stale_ms' giving its age.
         """
         # Detect and track face
         face_box = self.face_tracker.process_frame(frame)
@@ -48,111 +64,113 @@ class RPPGProcessor:
             "snr": 0.0
         }
         
-        if not face_box:
+        if face_box is None:
             # Clear buffers or append None? 
             # For robustness, maybe clear if face lost for too long.
             # For now, just return empty result.
             return result
             
-        # Extract ROIs
-        rois = self.roi_tracker.extract_rois(frame, face_box)
-        
-        # Update buffers
-        for key in self.buffers:
-            if key in rois:
-                self.buffers[key].append(rois[key])
-            else:
-                self.buffers[key].append(None)
-                
-            # Maintain buffer size
-            if len(self.buffers[key]) > self.buffer_size:
-                self.buffers[key].pop(0)
-                
-        # Check if we have enough data
-        if len(self.buffers["forehead"]) < self.fs * 2: # Need at least 2 seconds
+        # Extract ROI means
+        means = self.roi_engine.extract_means(frame, face_box)
+        if means is None:
             return result
             
-        # Process signals
-        signals = {}
-        roi_features = {}
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.resampler.gap(timestamp) > self.max_gap:
+            self.reset()
+        for sample in self.resampler.push(timestamp, means):
+            self.stream.push(sample)
         
-        for roi_name, roi_frames in self.buffers.items():
-            # Extract raw signal
-            # Note: SignalExtractor.extract expects a list of frames
-            raw_signal = self.signal_extractor.extract(roi_frames, method=self.method)
+        if not self.scheduler.tick():
+            # Between hops: ingest only, repeat the last verdict
+            if self.last_analysis is not None:
+                result.update(self.last_analysis)
+                result["stale_ms"] = self.scheduler.stale_ms()
+            return result
             
-            # Filter signal
-            filtered_signal = self.filter.apply(raw_signal)
-            signals[roi_name] = filtered_signal
+        self.scheduler.mark()
+        self.stream.advance()
+                
+        # Check if we have enough data
+        if len(self.stream.filtered) < self.fs * 2: # Need at least 2 seconds
+            return result
             
-            # Extract features
-            feats = self.feature_extractor.extract(filtered_signal)
-            roi_features[f"{roi_name}_features"] = feats
+        # Read out the running features
+        roi_features = {
+            f"{name}_features": feats
+            for name, feats in zip(self.roi_names, feature_rows(self.stream.features.features()))
+        }
             
         # Compute Consistency & Liveness
-        consistency = self._compute_consistency(signals, roi_features)
-        result["consistency"] = consistency
+        analysis = {}
+        consistency = self._compute_consistency(self.stream.filtered.view(), roi_features)
+        analysis["consistency"] = consistency
         
         liveness_score, label = self._classify_liveness({**roi_features, "consistency": consistency})
-        result["liveness_score"] = liveness_score
-        result["label"] = label
+        analysis["liveness_score"] = liveness_score
+        analysis["label"] = label
         
         # Aggregate BPM (mean of valid ROIs)
         bpms = [f["hr_bpm"] for f in roi_features.values() if f["hr_bpm"] > 0]
         if bpms:
-            result["bpm"] = np.mean(bpms)
+            analysis["bpm"] = np.mean(bpms)
             
-        result["snr"] = np.mean([f["snr"] for f in roi_features.values()])
+        analysis["snr"] = np.mean([f["snr"] for f in roi_features.values()])
+        
+        self.last_analysis = analysis
+        result.update(analysis)
+        result["stale_ms"] = 0.0
         
         return result
 
-    def process_video(self, source, duration=None):
+    def reset(self):
+        """Drop the real-time state (buffers, cached verdict)."""
+        self.stream.reset()
+        self.resampler.reset()
+        self.scheduler.reset()
+        self.last_analysis = None
+
+    def process_video(self, source, duration=None, start=None):
         """
         Process a video source to extract rPPG features.
         
         Args:
             source: Webcam index or file path.
             duration: Max duration to process in seconds (optional).
+            start: Offset into a video file in seconds (optional).
             
         Returns:
             dict: Aggregated features and liveness score.
         """
-        reader = VideoReader(source, target_fps=self.fs)
+        # Decode ahead on a background thread into reused buffers (each frame
+        # is reduced to ROI means right away); files are read as fast as possible
+        reader = VideoReader(source, target_fps=self.fs, prefetch=8, pool_size=1)
+        if start:
+            reader.seek(start)
         
-        frames = []
-        rois_data = {
-            "forehead": [],
-            "left_cheek": [],
-            "right_cheek": []
-        }
+        # Per-frame ROI means (ROIs, 3) and capture times; frames are dropped right after ingest
+        roi_means = []
+        timestamps = []
         
         frame_count = 0
-        max_frames = int(duration * self.fs) if duration else float('inf')
         
         try:
             for frame, timestamp in reader:
-                if frame_count >= max_frames:
+                if duration and timestamps and timestamp - timestamps[0] >= duration:
                     break
                     
                 # Detect and track face
                 face_box = self.face_tracker.process_frame(frame)
                 
-                if face_box:
-                    # Extract ROIs
-                    rois = self.roi_tracker.extract_rois(frame, face_box)
-                    
-                    for key in rois_data:
-                        if key in rois:
-                            rois_data[key].append(rois[key])
-                        else:
-                            # Handle missing ROI?
-                            pass
+                means = self.roi_engine.extract_means(frame, face_box) if face_box is not None else None
+                if means is not None:
+                    roi_means.append(means)
                 else:
-                    # Face lost, maybe append None or skip?
-                    # For signal continuity, we might want to append None or last valid?
-                    # SignalExtractor handles None/empty frames by appending 0.
-                    for key in rois_data:
-                        rois_data[key].append(None)
+                    # Face lost: append zeros to keep the trace aligned in time,
+                    # as SignalExtractor does for missing ROI frames.
+                    roi_means.append(np.zeros((len(self.roi_names), 3), dtype=np.float32))
+                timestamps.append(timestamp)
                 
                 frame_count += 1
                 
@@ -164,21 +182,19 @@ class RPPGProcessor:
         if frame_count == 0:
             return {"error": "No frames processed"}
 
-        # Process signals for each ROI
-        results = {}
-        signals = {}
+        # Process the signals of all ROIs together, on a uniform `fs` grid
+        # whatever the source frame rate or dropped frames
+        _, traces = resample_uniform(timestamps, np.stack(roi_means, axis=1), self.fs, axis=1) # (ROIs, N, 3)
         
-        for roi_name, roi_frames in rois_data.items():
-            # Extract raw signal
-            raw_signal = self.signal_extractor.extract(roi_frames, method=self.method)
-            
-            # Filter signal
-            filtered_signal = self.filter.apply(raw_signal)
-            signals[roi_name] = filtered_signal
-            
-            # Extract features
-            feats = self.feature_extractor.extract(filtered_signal)
-            results[f"{roi_name}_features"] = feats
+        # Extract raw signals
+        raw_signals = self.signal_extractor.extract_from_means(traces, method=self.method)
+        
+        # Filter signals
+        signals = self.filter.apply(raw_signals, axis=-1)
+        
+        # Extract features
+        features = feature_rows(self.feature_extractor.extract(signals))
+        results = {f"{name}_features": feats for name, feats in zip(self.roi_names, features)}
 
         # Compute Cross-ROI Consistency
         consistency = self._compute_consistency(signals, results)
@@ -188,48 +204,39 @@ class RPPGProcessor:
         liveness_score, label = self._classify_liveness(results)
         results["liveness_score"] = liveness_score
         results["label"] = label
+        results["frames"] = frame_count
         
         return results
 
     def _compute_consistency(self, signals, roi_features):
         """
         Compute consistency metrics across ROIs.
+        
+        Args:
+            signals: (ROIs, N) filtered signals, rows in `roi_names` order.
+            roi_features: Per-ROI feature dicts keyed "<roi>_features".
         """
-        roi_names = list(signals.keys())
-        if len(roi_names) < 2:
+        if len(signals) < 2 or signals.shape[-1] == 0:
             return {"mean_correlation": 0.0, "bpm_agreement": 0.0}
             
-        correlations = []
-        bpm_diffs = []
+        pairs = np.triu_indices(len(signals), k=1)
         
-        for i in range(len(roi_names)):
-            for j in range(i + 1, len(roi_names)):
-                name1, name2 = roi_names[i], roi_names[j]
-                s1 = signals[name1]
-                s2 = signals[name2]
-                
-                # Correlation
-                min_len = min(len(s1), len(s2))
-                if min_len > 0:
-                    # Normalize
-                    n1 = (s1[:min_len] - np.mean(s1[:min_len]))
-                    n2 = (s2[:min_len] - np.mean(s2[:min_len]))
-                    if np.std(n1) > 0 and np.std(n2) > 0:
-                        c = np.corrcoef(n1, n2)[0, 1]
-                        correlations.append(c)
-                
-                # BPM Agreement
-                bpm1 = roi_features.get(f"{name1}_features", {}).get("hr_bpm", 0)
-                bpm2 = roi_features.get(f"{name2}_features", {}).get("hr_bpm", 0)
-                if bpm1 > 0 and bpm2 > 0:
-                    bpm_diffs.append(abs(bpm1 - bpm2))
+        # Correlation of every ROI pair from a single matrix (flat signals give NaN)
+        correlations = correlation_matrix(signals)[pairs]
+        correlations = correlations[~np.isnan(correlations)]
+        
+        # BPM Agreement
+        bpms = np.array([
+            roi_features.get(f"{name}_features", {}).get("hr_bpm", 0) for name in self.roi_names
+        ])
+        both_valid = ((bpms[:, np.newaxis] > 0) & (bpms[np.newaxis, :] > 0))[pairs]
+        bpm_diffs = np.abs(bpms[:, np.newaxis] - bpms[np.newaxis, :])[pairs][both_valid]
                     
-        mean_corr = np.mean(correlations) if correlations else 0.0
+        mean_corr = np.mean(correlations) if correlations.size else 0.0
         
         agreement_rate = 0.0
-        if bpm_diffs:
-            agreement_count = sum(1 for d in bpm_diffs if d < 5.0)
-            agreement_rate = agreement_count / len(bpm_diffs)
+        if bpm_diffs.size:
+            agreement_rate = np.mean(bpm_diffs < 5.0)
             
         return {
             "mean_correlation": float(mean_corr),
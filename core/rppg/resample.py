@@ -0,0 +1,113 @@
+"""Resampling of timestamped ROI-mean traces onto a uniform time grid."""
+
+import math
+
+import numpy as np
+
+def resample_uniform(timestamps, values, fs, axis=0):
+    """
+    Linearly interpolate irregularly sampled values onto a uniform grid.
+
+    Frames that were dropped or arrived late only change the interpolation
+    weights, so the output keeps the true time scale that POS, the bandpass
+    and the spectral features assume.
+
+    Args:
+        timestamps: (N,) sample times in seconds, non-decreasing.
+        values: Array with N samples along `axis`.
+        fs: Output sampling rate (Hz).
+        axis: Time axis of `values`.
+
+    Returns:
+        tuple: (grid, resampled) where grid is (M,) times starting at
+               timestamps[0] and resampled has M samples along `axis`.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.moveaxis(np.asarray(values), axis, 0)
+    if len(timestamps) != len(values):
+        raise ValueError("timestamps and values must have the same number of samples")
+    if len(timestamps) < 2:
+        return timestamps.copy(), np.moveaxis(values.copy(), 0, axis)
+
+    # Duplicate timestamps (e.g. a camera repeating a frame) keep the first sample
+    keep = np.concatenate([[True], np.diff(timestamps) > 0])
+    timestamps, values = timestamps[keep], values[keep]
+
+    n = int(np.floor((timestamps[-1] - timestamps[0]) * fs + 1e-9)) + 1
+    grid = timestamps[0] + np.arange(n) / fs
+
+    # Interval of every grid point and its weight, shared by all channels
+    right = np.clip(np.searchsorted(timestamps, grid, side='right'), 1, len(timestamps) - 1)
+    left = right - 1
+    weight = (grid - timestamps[left]) / (timestamps[right] - timestamps[left])
+    weight = np.clip(weight, 0.0, 1.0).reshape((-1,) + (1,) * (values.ndim - 1))
+
+    resampled = values[left] + (values[right] - values[left]) * weight
+    return grid, np.moveaxis(resampled.astype(values.dtype, copy=False), 0, axis)
+
+class UniformResampler:
+    def __init__(self, fs=30):
+        """
+        Streaming counterpart of `resample_uniform`.
+
+        Each pushed sample yields the grid samples that fall between the
+        previous sample and it, interpolated linearly. Low-rate clients are
+        upsampled, dropped frames are bridged and duplicates are ignored.
+
+        Args:
+            fs: Output sampling rate (Hz).
+        """
+        self.fs = fs
+        self.reset()
+
+    def reset(self):
+        self.last_time = None
+        self.last_value = None
+        self.next_time = None
+
+    def gap(self, timestamp):
+        """
+        Seconds between `timestamp` and the last pushed sample (0 if none).
+
+        A step back of more than one sample period (client clock reset) is
+        infinite: `push` would discard every later frame until the clock
+        caught up, so callers should restart as for a long gap. Smaller
+        reorderings are left to `push`, which ignores them.
+        """
+        if self.last_time is None:
+            return 0.0
+        dt = timestamp - self.last_time
+        if dt < -1.0 / self.fs:
+            return math.inf
+        return dt
+
+    def push(self, timestamp, value):
+        """
+        Add one timestamped sample.
+
+        Args:
+            timestamp: Sample time in seconds.
+            value: Sample array (any shape).
+
+        Returns:
+            np.array: (k, *value.shape) grid samples, k >= 0.
+        """
+        value = np.asarray(value)
+        if self.last_time is None:
+            self.last_time, self.last_value = timestamp, value
+            self.next_time = timestamp + 1.0 / self.fs
+            return value[np.newaxis]
+
+        if timestamp <= self.last_time:
+            # Out-of-order or repeated frame: nothing new to interpolate
+            return np.empty((0,) + value.shape, dtype=value.dtype)
+
+        k = int(np.floor((timestamp - self.next_time) * self.fs + 1e-9)) + 1
+        k = max(k, 0)
+        grid = self.next_time + np.arange(k) / self.fs
+        weight = ((grid - self.last_time) / (timestamp - self.last_time)).reshape((-1,) + (1,) * value.ndim)
+        samples = self.last_value + (value - self.last_value) * weight
+
+        self.next_time += k / self.fs
+        self.last_time, self.last_value = timestamp, value
+        return samples.astype(value.dtype, copy=False)
@@ -0,0 +1,60 @@
+"""Analysis cadence for real-time sessions."""
+
+import time
+
+class AnalysisScheduler:
+    def __init__(self, hop_frames=None, hop_ms=None, clock=time.monotonic):
+        """
+        Decide when a session should rerun its liveness analysis.
+
+        The verdict barely changes from one frame to the next, so sessions
+        ingest every frame but only analyze once per hop and serve the
+        cached verdict in between.
+
+        Args:
+            hop_frames: Analyze at most once every `hop_frames` frames.
+            hop_ms: Analyze at most once every `hop_ms` milliseconds.
+                    With both None, every frame is analyzed. With both set,
+                    whichever hop elapses first triggers the analysis.
+            clock: Time source in seconds (monotonic by default).
+        """
+        self.hop_frames = hop_frames
+        self.hop_ms = hop_ms
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.frames_since = 0
+        self.last_time = None
+
+    def tick(self):
+        """
+        Count one ingested frame.
+
+        Returns:
+            bool: True if the analysis is due on this frame.
+        """
+        self.frames_since += 1
+        return self.due()
+
+    def due(self):
+        if self.last_time is None:
+            return True
+        if self.hop_frames is None and self.hop_ms is None:
+            return True
+        if self.hop_frames is not None and self.frames_since >= self.hop_frames:
+            return True
+        if self.hop_ms is not None and self.stale_ms() >= self.hop_ms:
+            return True
+        return False
+
+    def mark(self):
+        """Record that the analysis ran now."""
+        self.frames_since = 0
+        self.last_time = self.clock()
+
+    def stale_ms(self):
+        """Milliseconds since the last analysis (0 if none ran yet)."""
+        if self.last_time is None:
+            return 0.0
+        return (self.clock() - self.last_time) * 1000.0
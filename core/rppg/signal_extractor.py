@@ -1,95 +1,182 @@
 """rPPG signal extraction from facial ROI."""
 
 import numpy as np
+from .buffers import RingBuffer
 
 class SignalExtractor:
-    def __init__(self):
-        pass
-    
+    def __init__(self, fs=30, window_sec=1.6, buffer_size=300, rows=None):
+        """
+        Initialize SignalExtractor.
+
+        Args:
+            fs: Sampling rate of the color traces (Hz).
+            window_sec: Length of the short POS windows used in streaming mode.
+                        1.6 s covers at least one cardiac cycle down to ~40 BPM.
+            buffer_size: Number of pulse samples kept by the streaming mode.
+            rows: Number of traces streamed together (e.g. one per ROI), fed as
+                  (rows, 3) means. None streams a single trace of (3,) means.
+        """
+        self.fs = fs
+        self.buffer_size = buffer_size
+        self.rows = rows
+        self.window = int(np.clip(round(window_sec * fs), 2, buffer_size))
+        self.reset()
+
     def extract(self, roi_frames, method='green'):
         """
         Extract blood volume pulse signal.
-        
+
         Args:
             roi_frames: List or array of frames (N, H, W, 3).
             method: 'green' or 'pos'.
-            
+
         Returns:
             np.array: 1D rPPG signal.
         """
         # 1. Spatial Averaging
-        means = []
-        for frame in roi_frames:
-            if frame is None or frame.size == 0:
-                means.append([0, 0, 0])
-                continue
-            
-            if len(frame.shape) == 3:
-                # BGR to RGB if needed? 
-                # Assuming input is BGR (OpenCV default), so index 0=B, 1=G, 2=R
-                # POS expects RGB usually, but the relative changes matter.
-                # Let's stick to BGR order for consistency with OpenCV.
-                mean_bgr = np.mean(frame, axis=(0, 1))
-                means.append(mean_bgr)
-            else:
-                means.append([np.mean(frame)]*3)
-        
-        means = np.array(means) # (N, 3)
-        
+        means = np.array([self.spatial_mean(frame) for frame in roi_frames]) # (N, 3)
+        return self.extract_from_means(means, method)
+
+    def extract_from_means(self, means, method='green'):
+        """
+        Extract blood volume pulse signal from precomputed ROI means.
+
+        Args:
+            means: (N, 3) array of BGR means, or stacked traces (..., N, 3).
+            method: 'green' or 'pos'.
+
+        Returns:
+            np.array: rPPG signal(s) of shape (N,) or (..., N).
+        """
         if method == 'green':
-            return means[:, 1] # Green channel
-            
+            return means[..., 1] # Green channel
+
         elif method == 'pos':
             return self._pos(means)
-            
+
         else:
             raise ValueError(f"Unknown method: {method}")
 
+    @staticmethod
+    def spatial_mean(frame):
+        """
+        Average the pixels of an ROI patch.
+
+        Args:
+            frame: ROI patch (H, W, 3) or (H, W), or None.
+
+        Returns:
+            np.array: (3,) BGR mean. Missing or empty patches give zeros.
+        """
+        if frame is None or frame.size == 0:
+            return np.zeros(3)
+
+        if len(frame.shape) == 3:
+            # Assuming input is BGR (OpenCV default), so index 0=B, 1=G, 2=R
+            # POS expects RGB usually, but the relative changes matter.
+            # Let's stick to BGR order for consistency with OpenCV.
+            return np.mean(frame, axis=(0, 1))
+
+        return np.full(3, np.mean(frame))
+
+    def reset(self):
+        """Clear the streaming POS state."""
+        rows = self.rows or 1
+        self._colors = RingBuffer(rows, self.window, 3, dtype=np.float64)
+        self._pulse = RingBuffer(rows, self.buffer_size, dtype=np.float64)
+
+    def update(self, mean_bgr):
+        """
+        Streaming POS: push one BGR mean and extend the pulse signal.
+
+        Each call projects only the last `window` samples (overlap-add of
+        short, individually normalized windows), so the cost per frame does
+        not depend on `buffer_size`.
+
+        Args:
+            mean_bgr: (3,) spatial mean of the ROI for the new frame, or
+                      (rows, 3) means when streaming several traces.
+
+        Returns:
+            np.array: View of the pulse signal (up to `buffer_size` samples),
+                      (rows, N) when streaming several traces.
+                      It is only valid until the next call to `update`.
+        """
+        self._colors.push(np.reshape(mean_bgr, (-1, 3)))
+        self._pulse.push(0.0)
+
+        if self._colors.full:
+            # One POS projection over the windows of all traces
+            h = self._pos(self._colors.view())
+            pulse = self._pulse.view(self.window)
+            pulse += h - np.mean(h, axis=-1, keepdims=True)
+
+        return self.pulse()
+
+    def pulse(self):
+        """Current streaming pulse signal (view, valid until the next `update`)."""
+        pulse = self._pulse.view()
+        return pulse if self.rows else pulse[0]
+
+    def settled(self):
+        """
+        Latest pulse sample that later windows no longer change.
+
+        It lags the newest frame by `window - 1` samples, which makes it safe
+        to feed into causal stages such as `BandpassFilter.update`.
+
+        Returns:
+            float, (rows,) array or None: The sample(s), or None until the
+            first window is full.
+        """
+        if len(self._pulse) < self.window:
+            return None
+        settled = self._pulse.view(self.window)[:, 0]
+        return settled.copy() if self.rows else float(settled[0])
+
     def _pos(self, signals):
         """
         Plane-Orthogonal-to-Skin (POS) algorithm.
         Args:
-            signals: (N, 3) array of BGR means.
+            signals: (N, 3) array of BGR means, or stacked traces (..., N, 3).
         Returns:
-            (N,) rPPG signal.
+            (N,) or (..., N) rPPG signal.
         """
-        # Sliding window approach is often used, but for batch processing:
+        # Applied to the whole trace in batch mode, or to one short window
+        # at a time by `update` in streaming mode. Stacked traces (e.g. all
+        # ROIs of a session) are projected in a single vectorized pass.
         # 1. Temporal Normalization
         # Divide by mean to get normalized color variations
-        # Avoid division by zero
-        mean_color = np.mean(signals, axis=0)
-        if np.any(mean_color == 0):
-            return np.zeros(len(signals))
-            
-        norm_signals = signals / mean_color # Cn
-        
+        # Avoid division by zero: traces with a zero channel mean give zeros
+        mean_color = np.mean(signals, axis=-2, keepdims=True)
+        valid = np.all(mean_color != 0, axis=-1)
+
+        norm_signals = signals / np.where(mean_color == 0, 1, mean_color) # Cn
+
         # 2. Projection
-        # POS uses a projection matrix. 
+        # POS uses a projection matrix.
         # Assuming BGR input: B=0, G=1, R=2
         # Standard POS uses RGB. Let's map BGR to RGB indices.
         # R is index 2, G is index 1, B is index 0.
-        
+
         # S1 = G - B
         # S2 = G + B - 2R
-        
+
         # Using BGR indices:
-        # S1 = signals[:, 1] - signals[:, 0]
-        # S2 = signals[:, 1] + signals[:, 0] - 2 * signals[:, 2]
-        
-        s1 = norm_signals[:, 1] - norm_signals[:, 0]
-        s2 = norm_signals[:, 1] + norm_signals[:, 0] - 2 * norm_signals[:, 2]
-        
+        # S1 = signals[..., 1] - signals[..., 0]
+        # S2 = signals[..., 1] + signals[..., 0] - 2 * signals[..., 2]
+
+        s1 = norm_signals[..., 1] - norm_signals[..., 0]
+        s2 = norm_signals[..., 1] + norm_signals[..., 0] - 2 * norm_signals[..., 2]
+
         # 3. Alpha Tuning
         # H = S1 + alpha * S2
-        # alpha = std(S1) / std(S2)
-        
-        std1 = np.std(s1)
-        std2 = np.std(s2)
-        
-        if std2 == 0:
-            return s1
-            
-        alpha = std1 / std2
+        # alpha = std(S1) / std(S2), or 0 (H = S1) when S2 is flat
+
+        std1 = np.std(s1, axis=-1, keepdims=True)
+        std2 = np.std(s2, axis=-1, keepdims=True)
+
+        alpha = np.divide(std1, std2, out=np.zeros_like(std1), where=std2 > 0)
         h = s1 + alpha * s2
-        
-        return h
+
+        return np.where(valid, h, 0.0)
@@ -0,0 +1,98 @@
+"""Real-time rPPG state of one session."""
+
+import numpy as np
+from .buffers import RingBuffer
+from .signal_extractor import SignalExtractor
+from .filters import BandpassFilter
+from .features import FeatureTracker
+
+class RPPGStream:
+    def __init__(self, n_rois, fs=30, buffer_size=300, method='pos'):
+        """
+        Streaming rPPG pipeline: ROI means in, filtered signals and features out.
+
+        Ingest (`push`) only stores the ROI means. The signal stages (POS,
+        bandpass, feature tracking) catch up on the pending samples when
+        `advance` is called, so a session can ingest every frame and run
+        the stages only when it actually needs a verdict.
+
+        Args:
+            n_rois: Number of ROIs per frame.
+            fs: Sampling rate (Hz).
+            buffer_size: Samples kept per ROI (analysis window).
+            method: 'pos' or 'green'.
+        """
+        if method not in ('pos', 'green'):
+            raise ValueError(f"Unknown method: {method}")
+
+        self.n_rois = n_rois
+        self.fs = fs
+        self.buffer_size = buffer_size
+        self.method = method
+
+        # Per-ROI mean colors (ROIs x window x 3), reduced at ingest
+        self.means = RingBuffer(n_rois, buffer_size, 3)
+        # Streaming POS, bandpass and features, each over all ROIs at once
+        self.pulse = SignalExtractor(fs=fs, buffer_size=buffer_size, rows=n_rois)
+        self.filter = BandpassFilter(fs=fs)
+        self.filtered = RingBuffer(n_rois, buffer_size)
+        self.features = FeatureTracker(fs=fs, window=buffer_size, rows=n_rois)
+        self._pending = 0
+
+    def push(self, means):
+        """
+        Ingest the ROI means of one frame.
+
+        Args:
+            means: (n_rois, 3) BGR means.
+        """
+        self.means.push(means)
+        self._pending += 1
+
+    def advance(self):
+        """
+        Run the samples pushed since the last call through the signal stages.
+
+        Returns:
+            int: Number of new filtered samples (POS holds back the newest
+                 `window - 1` until later windows stop changing them).
+        """
+        if self._pending > self.buffer_size:
+            # Samples older than the window are gone: continuing the stages'
+            # state across the hole would splice unrelated signal, so they
+            # restart from what is left
+            self.pulse.reset()
+            self.filter.reset()
+            self.filtered.clear()
+            self.features.reset()
+        pending = self.means.view(self._pending) # (ROIs, k, 3)
+        self._pending = 0
+
+        if self.method == 'pos':
+            settled = []
+            for j in range(pending.shape[1]):
+                self.pulse.update(pending[:, j])
+                sample = self.pulse.settled()
+                if sample is not None:
+                    settled.append(sample)
+            if not settled:
+                return 0
+            settled = np.stack(settled, axis=1)
+        else:
+            # Green channel samples are final as soon as they arrive
+            settled = pending[..., 1]
+
+        # Filter only the samples that will no longer change
+        filtered = self.filter.update(settled) # (ROIs, k)
+        for j in range(filtered.shape[1]):
+            self.filtered.push(filtered[:, j])
+        self.features.update(filtered)
+        return filtered.shape[1]
+
+    def reset(self):
+        self.means.clear()
+        self.pulse.reset()
+        self.filter.reset()
+        self.filtered.clear()
+        self.features.reset()
+        self._pending = 0
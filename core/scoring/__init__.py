@@ -2,3 +2,4 @@
 from .model import TrustModel
 from .thresholds import Thresholds
 from .trust_state import TrustState
+from .sequential import SequentialTest
@@ -0,0 +1,78 @@
+"""Sequential (SPRT) liveness decisions over successive analysis hops."""
+
+import math
+
+class SequentialTest:
+    def __init__(self, alpha=0.01, beta=0.01, mu_live=1.0, mu_spoof=0.7, sigma=0.15,
+                 min_observations=1, max_observations=None):
+        """
+        Wald's sequential probability ratio test on liveness scores.
+
+        Every analysis hop contributes the log-likelihood ratio of its score
+        under a "live" and a "spoof" Gaussian model. The verdict is issued as
+        soon as the accumulated evidence crosses either threshold, so clear
+        cases are decided after a few hops and only ambiguous ones keep
+        collecting.
+
+        Args:
+            alpha: Target rate of accepting a spoof as live.
+            beta: Target rate of rejecting a live subject.
+            mu_live: Mean score of live subjects.
+            mu_spoof: Mean score of spoofs.
+            sigma: Score standard deviation under both models.
+            min_observations: Hops before any decision. Scores are coarse
+                              (steps of 0.1-0.2), and with the defaults a
+                              single hop at 0.5 already crosses the lower
+                              threshold, so one bad early window would
+                              otherwise issue a sticky LOW. Evidence still
+                              accumulates from the first hop.
+            max_observations: Force a decision (sign of the evidence) after
+                              this many hops. None waits indefinitely.
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.mu_live = mu_live
+        self.mu_spoof = mu_spoof
+        self.sigma = sigma
+        self.min_observations = min_observations
+        self.max_observations = max_observations
+
+        # Wald's thresholds on the log-likelihood ratio (live vs spoof)
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.reset()
+
+    def reset(self):
+        self.llr = 0.0
+        self.observations = 0
+        self.decision = None
+
+    def update(self, score, weight=1.0):
+        """
+        Add the score of one analysis hop.
+
+        Args:
+            score: Liveness score in [0, 1].
+            weight: Evidence weight in (0, 1]. Successive hops analyze
+                    overlapping windows, so their scores are not independent;
+                    a weight below 1 discounts that overlap.
+
+        Returns:
+            str: "HIGH" or "LOW" once decided (sticky until reset), else None.
+        """
+        if self.decision is not None:
+            return self.decision
+
+        var = self.sigma * self.sigma
+        self.llr += weight * ((score - self.mu_spoof) ** 2 - (score - self.mu_live) ** 2) / (2 * var)
+        self.observations += 1
+
+        if self.observations < self.min_observations:
+            return None
+        if self.llr >= self.upper:
+            self.decision = "HIGH"
+        elif self.llr <= self.lower:
+            self.decision = "LOW"
+        elif self.max_observations is not None and self.observations >= self.max_observations:
+            self.decision = "HIGH" if self.llr > 0 else "LOW"
+        return self.decision
@@ -1,4 +1,5 @@
 # Vision module - Face detection & ROI tracking
 from .face_detector import FaceDetector
 from .roi_tracker import ROITracker
+from .roi_engine import ROIEngine
 from .stabilization import Stabilizer
\ No newline at end of file
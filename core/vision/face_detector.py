@@ -1,24 +1,95 @@
 """Face detection using Haar Cascade."""
 
 import cv2
+import numpy as np
 
 class FaceDetector:
-    def __init__(self):
+    def __init__(self, max_width=640, search_margin=0.5, size_range=(0.7, 1.4), face_px=96):
+        """
+        Args:
+            max_width: Full-frame scans run on the frame downscaled to at most
+                       this width (None scans at full resolution).
+            search_margin: After a hit, the next scan is limited to the last
+                           box expanded by this fraction of its size per side.
+                           None always scans the full frame.
+            size_range: (min, max) face size relative to the last face,
+                        passed to the cascade as minSize/maxSize.
+            face_px: Windowed scans downscale the window so the expected
+                     face is about this many pixels wide.
+        """
         self.face_cascade = cv2.CascadeClassifier(
             cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
         )
+        self.max_width = max_width
+        self.search_margin = search_margin
+        self.size_range = size_range
+        self.face_px = face_px
+        self.last_box = None
+
+    def reset(self):
+        self.last_box = None
 
     def detect(self, frame):
+        """
+        Detect the largest face.
+
+        Scans a window around the previous face when there is one, and the
+        whole (downscaled) frame otherwise or when the window misses.
+
+        Returns:
+            tuple: (x, y, w, h) in frame coordinates, or None.
+        """
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        face = None
+        if self.last_box is not None and self.search_margin is not None:
+            face = self._detect_window(gray)
+        if face is None:
+            face = self._detect_full(gray)
+
+        self.last_box = face
+        return face
+
+    def _detect_full(self, gray):
+        h, w = gray.shape[:2]
+        scale = min(1.0, self.max_width / w) if self.max_width else 1.0
+        return self._scan(gray, scale, (0, 0))
+
+    def _detect_window(self, gray):
+        x, y, w, h = self.last_box
+        fh, fw = gray.shape[:2]
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(x - mx, 0), max(y - my, 0)
+        x1, y1 = min(x + w + mx, fw), min(y + h + my, fh)
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        scale = min(1.0, self.face_px / max(w, 1))
+        # Only faces of about the last size, in scaled pixels
+        min_side = max(int(w * self.size_range[0] * scale), 24)
+        max_side = max(int(w * self.size_range[1] * scale), min_side + 1)
+        return self._scan(gray[y0:y1, x0:x1], scale, (x0, y0),
+                          min_size=(min_side, min_side), max_size=(max_side, max_side))
+
+    def _scan(self, gray, scale, offset, min_size=None, max_size=None):
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        kwargs = {}
+        if min_size is not None:
+            kwargs["minSize"] = min_size
+            kwargs["maxSize"] = max_size
         faces = self.face_cascade.detectMultiScale(
             gray,
             scaleFactor=1.3,
-            minNeighbors=5
+            minNeighbors=5,
+            **kwargs
         )
 
         if len(faces) == 0:
             return None
 
         # take the largest face
-        faces = sorted(faces, key=lambda x: x[2] * x[3], reverse=True)
-        return faces[0]  # (x, y, w, h)
\ No newline at end of file
+        faces = np.asarray(faces)
+        x, y, w, h = faces[np.argmax(faces[:, 2] * faces[:, 3])] / scale
+        return (int(x) + offset[0], int(y) + offset[1], int(w), int(h))
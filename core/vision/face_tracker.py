@@ -1,59 +1,128 @@
+import cv2
 import numpy as np
 from .face_detector import FaceDetector
 
 class FaceTracker:
-    def __init__(self, alpha=0.7):
+    def __init__(self, alpha=0.7, detect_every=1, min_confidence=0.5, max_points=40):
         """
         Initialize FaceTracker.
-        
+
         Args:
             alpha: Smoothing factor for exponential moving average (0 < alpha <= 1).
                    Higher alpha = more responsive, lower alpha = smoother.
+            detect_every: Run the face detector every N frames. In between, the
+                          box is moved with sparse Lucas-Kanade optical flow on
+                          feature points inside the face. 1 detects every frame.
+            min_confidence: Fraction of flow points that must track reliably;
+                            below it the detector runs on the current frame.
+            max_points: Feature points tracked inside the face.
         """
         self.detector = FaceDetector()
         self.alpha = alpha
+        self.detect_every = max(1, detect_every)
+        self.min_confidence = min_confidence
+        self.max_points = max_points
+        self.reset()
+
+    def reset(self):
+        self.detector.reset()
         self.bbox = None # (x, y, w, h)
+        self.prev_gray = None
+        self.points = None
+        self.frames_since_detect = 0
+        self.confidence = 0.0
 
     def process_frame(self, frame):
         """
         Detect and track face in the frame.
-        
+
         Args:
             frame: Input image.
-            
+
         Returns:
             tuple: (x, y, w, h) of the tracked face, or None if lost.
         """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if self.detect_every > 1 else None
+
+        tracked = False
+        if gray is not None and self.frames_since_detect < self.detect_every:
+            tracked = self._track(gray)
+
+        if not tracked:
+            self._detect(frame)
+            if gray is not None and self.bbox is not None:
+                self._init_points(gray)
+
+        self.prev_gray = gray
+        return self.bbox
+
+    def _detect(self, frame):
         detected_bbox = self.detector.detect(frame)
-        
+        self.frames_since_detect = 1
+
         if detected_bbox is not None:
             if self.bbox is None:
-                self.bbox = detected_bbox
+                self.bbox = tuple(int(v) for v in detected_bbox)
             else:
                 # Smooth the bounding box
                 dx, dy, dw, dh = detected_bbox
                 sx, sy, sw, sh = self.bbox
-                
+
                 nx = int(self.alpha * dx + (1 - self.alpha) * sx)
                 ny = int(self.alpha * dy + (1 - self.alpha) * sy)
                 nw = int(self.alpha * dw + (1 - self.alpha) * sw)
                 nh = int(self.alpha * dh + (1 - self.alpha) * sh)
-                
+
                 self.bbox = (nx, ny, nw, nh)
-        else:
-            # If detection fails, we might want to keep the last known position for a few frames
-            # For now, let's just return the last known bbox if it exists, 
-            # but maybe we should decay confidence?
-            # The user requirement says "Tracks the face...". 
-            # If we lose detection, maybe we should return None or keep last.
-            # Let's keep last for robustness, but maybe reset if lost for too long?
-            # For simplicity, if detection fails, we return None to indicate "No Face Found" 
-            # so we don't extract garbage.
-            # BUT, Haar cascade is flickery. 
-            # Let's stick to: if detection fails, return None, but in a real tracker we'd use optical flow.
-            # Given the constraints, let's just return None if detection fails, 
-            # but maybe the user wants smoothing to handle missed detections?
-            # "Tracks the face across frames (e.g., simple bounding-box smoothing...)"
-            pass
+        # If detection fails, keep the last known box (Haar cascade is flickery)
 
-        return self.bbox
+    def _init_points(self, gray):
+        # Corners in the inner face (skip the background at the box edges)
+        x, y, w, h = self.bbox
+        mask = np.zeros_like(gray)
+        mask[max(y + h // 8, 0):max(y + h * 7 // 8, 0), max(x + w // 8, 0):max(x + w * 7 // 8, 0)] = 255
+        self.points = cv2.goodFeaturesToTrack(
+            gray, maxCorners=self.max_points, qualityLevel=0.01, minDistance=max(3, w // 20), mask=mask
+        )
+        self.confidence = 1.0 if self.points is not None else 0.0
+
+    def _track(self, gray):
+        """
+        Move the box with the optical flow of the face points.
+
+        Returns:
+            bool: False if tracking is not reliable and the detector must run.
+        """
+        if self.bbox is None or self.prev_gray is None or self.points is None or len(self.points) < 5:
+            return False
+
+        # Forward-backward LK: points that don't return to where they started are unreliable
+        lk = dict(winSize=(15, 15), maxLevel=2,
+                  criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.points, None, **lk)
+        back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, new_points, None, **lk)
+        fb_error = np.linalg.norm((self.points - back_points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < 1.0)
+
+        self.confidence = good.mean()
+        if self.confidence < self.min_confidence or good.sum() < 5:
+            return False
+
+        old = self.points.reshape(-1, 2)[good]
+        new = new_points.reshape(-1, 2)[good]
+
+        # Translation and scale from the medians (robust to a few bad points)
+        shift = np.median(new - old, axis=0)
+        old_spread = np.linalg.norm(old - old.mean(axis=0), axis=1)
+        new_spread = np.linalg.norm(new - new.mean(axis=0), axis=1)
+        valid = old_spread > 1e-3
+        scale = np.median(new_spread[valid] / old_spread[valid]) if valid.any() else 1.0
+
+        x, y, w, h = self.bbox
+        cx, cy = x + w / 2 + shift[0], y + h / 2 + shift[1]
+        w, h = w * scale, h * scale
+        self.bbox = (int(round(cx - w / 2)), int(round(cy - h / 2)), int(round(w)), int(round(h)))
+
+        self.points = new.reshape(-1, 1, 2)
+        self.frames_since_detect += 1
+        return True
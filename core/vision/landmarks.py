@@ -0,0 +1,153 @@
+"""Shared FaceMesh landmark service."""
+
+import cv2
+import numpy as np
+import mediapipe as mp
+
+try:
+    mp_face = mp.solutions.face_mesh
+except AttributeError:
+    class MockSolutions:
+        face_mesh = None
+    mp_face = MockSolutions()
+
+# FaceMesh landmark indices
+LEFT_EYE = [33, 160, 158, 133, 153, 144]
+RIGHT_EYE = [362, 385, 387, 263, 373, 380]
+NOSE_TIP = 1
+
+# Skin patches for rPPG, anchored to landmarks (bounding box of each set)
+LANDMARK_ROIS = {
+    "forehead": [67, 109, 10, 338, 297, 69, 108, 151, 337, 299],
+    "left_cheek": [116, 117, 118, 119, 100, 36, 205, 187, 123],
+    "right_cheek": [345, 346, 347, 348, 329, 266, 425, 411, 352],
+}
+
+def eye_aspect_ratios(landmarks):
+    """
+    Eye aspect ratio of both eyes at once.
+
+    Args:
+        landmarks: (N, 2) landmark pixel coordinates.
+
+    Returns:
+        np.array: (2,) EAR of the left and right eye.
+    """
+    eyes = landmarks[[LEFT_EYE, RIGHT_EYE]] # (2, 6, 2)
+    a = np.linalg.norm(eyes[:, 1] - eyes[:, 5], axis=-1)
+    b = np.linalg.norm(eyes[:, 2] - eyes[:, 4], axis=-1)
+    c = np.linalg.norm(eyes[:, 0] - eyes[:, 3], axis=-1)
+    return (a + b) / (2.0 * c + 1e-6)
+
+def face_box(landmarks):
+    """(x, y, w, h) bounding box of the landmarks."""
+    x0, y0 = np.floor(landmarks.min(axis=0)).astype(int)
+    x1, y1 = np.ceil(landmarks.max(axis=0)).astype(int)
+    return (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+
+def roi_means(frame, landmarks, rois=None):
+    """
+    Mean BGR color of the landmark-anchored skin patches.
+
+    Args:
+        frame: BGR image.
+        landmarks: (N, 2) landmark pixel coordinates.
+        rois: Dict of name -> landmark indices (default LANDMARK_ROIS).
+
+    Returns:
+        np.array: (len(rois), 3) float32 means, or None if a patch falls
+                  outside the frame.
+    """
+    rois = LANDMARK_ROIS if rois is None else rois
+    h, w = frame.shape[:2]
+    means = np.zeros((len(rois), 3), dtype=np.float32)
+    for i, indices in enumerate(rois.values()):
+        points = landmarks[indices]
+        x0, y0 = np.maximum(np.floor(points.min(axis=0)).astype(int), 0)
+        x1, y1 = np.minimum(np.ceil(points.max(axis=0)).astype(int), (w, h))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        means[i] = cv2.mean(frame[y0:y1, x0:x1])[:3]
+    return means
+
+class LandmarkService:
+    def __init__(self, every=1, refine_landmarks=True):
+        """
+        Run FaceMesh once per frame (or every N frames) and publish the
+        landmarks to every subscribed consumer.
+
+        Between inferences the landmarks are extrapolated with the velocity
+        observed between the last two inferences.
+
+        Args:
+            every: Run FaceMesh every `every` frames.
+            refine_landmarks: Passed to FaceMesh (iris landmarks).
+        """
+        face_mesh_cls = getattr(mp_face, "FaceMesh", None)
+        self.face_mesh = face_mesh_cls(refine_landmarks=refine_landmarks) if face_mesh_cls else None
+        self.every = max(1, every)
+        self.consumers = []
+        self.reset()
+
+    def reset(self):
+        self.landmarks = None
+        self.velocity = None
+        self.frames_since = 0
+        self.start_time = None
+
+    def subscribe(self, consumer, duration=None):
+        """
+        Call `consumer.update(landmarks, frame, timestamp)` on every frame.
+
+        Args:
+            consumer: Object with an `update` method. Landmarks are an (N, 2)
+                      float32 array in pixels, or None when no face is found;
+                      they are shared and must not be modified.
+            duration: Stop feeding the consumer this many seconds after the
+                      first frame (None: always).
+        """
+        self.consumers.append((consumer, duration))
+
+    def process(self, frame, timestamp=None):
+        """
+        Landmarks of one frame, published to the consumers.
+
+        Returns:
+            np.array: (N, 2) landmark pixel coordinates, or None.
+        """
+        if self.frames_since % self.every == 0 or self.landmarks is None:
+            landmarks = self._infer(frame)
+            if landmarks is not None and self.landmarks is not None and self.every > 1:
+                # Per-frame velocity since the previous inference
+                self.velocity = (landmarks - self.landmarks) / max(self.frames_since, 1)
+            else:
+                self.velocity = None
+            self.landmarks = landmarks
+            self.frames_since = 0
+            current = landmarks
+        else:
+            current = self.landmarks
+            if self.velocity is not None:
+                current = self.landmarks + self.velocity * self.frames_since
+        self.frames_since += 1
+
+        if timestamp is not None and self.start_time is None:
+            self.start_time = timestamp
+        elapsed = timestamp - self.start_time if timestamp is not None else 0.0
+        for consumer, duration in self.consumers:
+            if duration is None or elapsed < duration:
+                consumer.update(current, frame, timestamp)
+        return current
+
+    def _infer(self, frame):
+        if self.face_mesh is None:
+            return None
+
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        result = self.face_mesh.process(rgb)
+        if not result.multi_face_landmarks:
+            return None
+
+        h, w, _ = frame.shape
+        lm = result.multi_face_landmarks[0].landmark
+        return np.array([(p.x * w, p.y * h) for p in lm], dtype=np.float32)
@@ -0,0 +1,106 @@
+"""Integral-image ROI means for rPPG extraction."""
+
+import cv2
+import numpy as np
+
+# Named regions as (x0, y0, x1, y1) fractions of the face box, same as ROITracker
+DEFAULT_REGIONS = {
+    "forehead": (1 / 4, 0.0, 3 / 4, 1 / 4),
+    "left_cheek": (0.0, 1 / 2, 1 / 3, 3 / 4),
+    "right_cheek": (2 / 3, 1 / 2, 1.0, 3 / 4),
+}
+
+# Skin range in YCrCb (Cr, Cb), robust across skin tones under normal lighting
+SKIN_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+SKIN_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+class ROIEngine:
+    def __init__(self, regions=None, grid=(3, 3), skin_mask=True):
+        """
+        Initialize ROIEngine.
+
+        All ROI means of a frame come from integral images of the face crop,
+        so each rectangle costs O(1) and the per-frame cost does not grow
+        with the number of regions.
+
+        Args:
+            regions: Dict of name -> (x0, y0, x1, y1) fractions of the face box.
+                     Defaults to the forehead/cheek regions of ROITracker.
+            grid: (rows, cols) dense grid of face sub-regions, or None.
+            skin_mask: If True, grid cells are averaged over skin pixels only
+                       and a whole-face "skin" ROI is added.
+        """
+        regions = DEFAULT_REGIONS if regions is None else regions
+        self.skin_mask = skin_mask
+
+        names = list(regions)
+        rects = [regions[name] for name in names]
+        self.n_regions = len(names)
+
+        if grid:
+            rows, cols = grid
+            for r in range(rows):
+                for c in range(cols):
+                    names.append(f"grid_{r}_{c}")
+                    rects.append((c / cols, r / rows, (c + 1) / cols, (r + 1) / rows))
+        if skin_mask:
+            names.append("skin")
+            rects.append((0.0, 0.0, 1.0, 1.0))
+
+        self.names = tuple(names)
+        self.rects = np.array(rects, dtype=np.float64).reshape(-1, 4)
+        # Which rectangles are averaged over skin pixels only
+        self.skin_weighted = np.arange(len(names)) >= self.n_regions if skin_mask else np.zeros(len(names), bool)
+
+    def extract_means(self, frame, face_box):
+        """
+        Mean color of every ROI.
+
+        Args:
+            frame: BGR image.
+            face_box: (x, y, w, h) face bounding box.
+
+        Returns:
+            np.array: (len(names), 3) float32 BGR means, or None if the face
+                      box does not overlap the frame. Empty ROIs give zeros.
+        """
+        x, y, w, h = (int(v) for v in face_box)
+        fh, fw = frame.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, fw), min(y + h, fh)
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        crop = frame[y0:y1, x0:x1]
+
+        # Rectangle edges in crop coordinates (floor, like the integer slicing in ROITracker)
+        xs = np.clip(x + np.floor(self.rects[:, [0, 2]] * w + 1e-9).astype(int) - x0, 0, x1 - x0)
+        ys = np.clip(y + np.floor(self.rects[:, [1, 3]] * h + 1e-9).astype(int) - y0, 0, y1 - y0)
+        area = ((xs[:, 1] - xs[:, 0]) * (ys[:, 1] - ys[:, 0])).astype(np.float64)
+
+        sums = self._rect_sums(cv2.integral(crop, sdepth=cv2.CV_64F), xs, ys)
+        means = np.divide(sums, area[:, np.newaxis], out=np.zeros_like(sums), where=area[:, np.newaxis] > 0)
+
+        if self.skin_mask:
+            mask = self._skin(crop)
+            skin_sums = self._rect_sums(cv2.integral(cv2.bitwise_and(crop, crop, mask=mask), sdepth=cv2.CV_64F), xs, ys)
+            skin_count = self._rect_sums(cv2.integral(mask // 255, sdepth=cv2.CV_64F), xs, ys)
+            # Cells without any skin pixel keep their plain mean
+            use_skin = self.skin_weighted & (skin_count[:, 0] > 0)
+            means[use_skin] = skin_sums[use_skin] / skin_count[use_skin]
+
+        return means.astype(np.float32)
+
+    @staticmethod
+    def _rect_sums(integral, xs, ys):
+        # Sum over [y0, y1) x [x0, x1) from the four integral-image corners
+        integral = integral.reshape(integral.shape[0], integral.shape[1], -1)
+        return (
+            integral[ys[:, 1], xs[:, 1]] - integral[ys[:, 0], xs[:, 1]]
+            - integral[ys[:, 1], xs[:, 0]] + integral[ys[:, 0], xs[:, 0]]
+        )
+
+    @staticmethod
+    def _skin(crop):
+        ycrcb = cv2.cvtColor(crop, cv2.COLOR_BGR2YCrCb)
+        return cv2.inRange(ycrcb, SKIN_LOWER, SKIN_UPPER)
@@ -1,6 +1,11 @@
 """ROI (Region of Interest) tracking for rPPG extraction."""
 
+import cv2
+import numpy as np
+
 class ROITracker:
+    names = ("forehead", "left_cheek", "right_cheek")
+
     def extract_rois(self, frame, face_box):
         x, y, w, h = face_box
 
@@ -23,4 +28,22 @@ class ROITracker:
             "forehead": forehead,
             "left_cheek": left_cheek,
             "right_cheek": right_cheek
-        }
\ No newline at end of file
+        }
+
+    def extract_means(self, frame, face_box):
+        """
+        Reduce each ROI to its mean color at ingest.
+
+        The patches returned by `extract_rois` are views that keep the whole
+        frame alive, so real-time buffers should store these means instead.
+
+        Returns:
+            np.array: (len(names), 3) float32 BGR means, zeros for empty ROIs.
+        """
+        rois = self.extract_rois(frame, face_box)
+        means = np.zeros((len(self.names), 3), dtype=np.float32)
+        for i, name in enumerate(self.names):
+            patch = rois[name]
+            if patch.size > 0:
+                means[i] = cv2.mean(patch)[:3]
+        return means
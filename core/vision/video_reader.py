@@ -1,57 +1,213 @@
 import cv2
 import time
-import numpy as np
+import queue
+import threading
+from collections import deque
 
 class VideoReader:
-    def __init__(self, source=0, target_fps=30):
+    def __init__(self, source=0, target_fps=30, realtime=None, prefetch=0, pool_size=0,
+                 decimate=None):
         """
         Initialize VideoReader.
-        
+
         Args:
             source: Webcam index (int) or video file path (str).
             target_fps: Target FPS to yield frames at. If None, uses source FPS.
+            realtime: Pace frames on the wall clock (sleep to `target_fps`).
+                      Defaults to True for webcams and False for files, which
+                      are then read as fast as possible with media timestamps.
+            prefetch: Frames decoded ahead on a background thread (0 = decode
+                      on the consumer thread). Live sources drop the oldest
+                      queued frame when the consumer falls behind; files block.
+            pool_size: If > 0, decode into a fixed pool of reusable buffers
+                       instead of allocating every frame. The consumer may hold
+                       up to `pool_size` yielded frames at once; older ones are
+                       overwritten, so copy any frame kept longer.
+            decimate: Skip frames to approach `target_fps` when the source is
+                      faster. Skipped frames are only grabbed, never decoded.
+                      Defaults to True for files.
         """
         self.cap = cv2.VideoCapture(source)
         if not self.cap.isOpened():
             raise ValueError(f"Could not open video source: {source}")
-            
+
+        self.is_file = not isinstance(source, int)
+        self.realtime = (not self.is_file) if realtime is None else realtime
         self.target_fps = target_fps
         self.source_fps = self.cap.get(cv2.CAP_PROP_FPS)
         if self.source_fps <= 0:
             self.source_fps = 30.0 # Default fallback
-            
+
         self.frame_interval = 1.0 / target_fps if target_fps else 1.0 / self.source_fps
         self.last_frame_time = 0
 
+        # Decimation keeps the first frame at or after each target time; half a
+        # source frame of tolerance absorbs timestamp jitter
+        if decimate is None:
+            decimate = self.is_file
+        self.decimate = bool(decimate and target_fps and target_fps < self.source_fps)
+        self.tolerance = 0.5 / self.source_fps
+        self.next_keep = None
+
+        # Frame pool: enough buffers for the frames held by the consumer, queued
+        # for it and being decoded. Buffers start unallocated (None) and are
+        # recycled once the consumer has moved `pool_size` frames past them.
+        self.prefetch = prefetch
+        self.pool_size = pool_size
+        self.free = None
+        if pool_size > 0:
+            self.free = queue.Queue()
+            for _ in range(pool_size + prefetch + 1):
+                self.free.put(None)
+        self.delivered = deque()
+
+        self.queue = None
+        self.thread = None
+        self.stopped = threading.Event()
+        self.finished = False
+
     def __iter__(self):
         return self
 
     def __next__(self):
+        if self.prefetch > 0:
+            item = self._next_prefetched()
+        else:
+            item = self._read()
+        if item is None:
+            raise StopIteration
+
+        if self.free is not None:
+            self.delivered.append(item[0])
+            if len(self.delivered) > self.pool_size:
+                self.free.put(self.delivered.popleft())
+
+        if self.realtime and self.target_fps:
+            # Rate limiting on the wall clock
+            elapsed = time.time() - self.last_frame_time
+            if elapsed < self.frame_interval:
+                # Sleep to save CPU
+                time.sleep(self.frame_interval - elapsed)
+            self.last_frame_time = time.time()
+
+        return item
+
+    def _read(self):
+        """Decode the next kept frame and its timestamp, or None at the end."""
+        # grab() every frame, but retrieve() (decode) only the kept ones
         while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                raise StopIteration
-                
-            current_time = time.time()
-            # Rate limiting
-            if self.target_fps:
-                elapsed = current_time - self.last_frame_time
-                if elapsed < self.frame_interval:
-                    # Sleep to save CPU
-                    time.sleep(self.frame_interval - elapsed)
-                    current_time = time.time()
-                
-            self.last_frame_time = current_time
-            
-            # Timestamp
-            # For files, use CAP_PROP_POS_MSEC
-            # For webcam, use relative time
-            if self.source_fps > 0 and self.source_fps < 1000: # Likely a file
-                 timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if not self.cap.grab():
+                return None
+            timestamp = self._timestamp()
+            if not self.decimate or self.next_keep is None or timestamp >= self.next_keep - self.tolerance:
+                break
+
+        if self.decimate:
+            # Stay on the target grid; restart it after a jump (e.g. a seek)
+            if self.next_keep is None or timestamp - self.next_keep > self.frame_interval:
+                self.next_keep = timestamp
+            self.next_keep += self.frame_interval
+
+        if self.free is not None:
+            buffer = self._free_buffer()
+            if self.stopped.is_set():
+                return None
+            if buffer is None:
+                ret, frame = self.cap.retrieve()
             else:
-                 timestamp = time.time()
-            
-            return frame, timestamp
+                ret, frame = self.cap.retrieve(buffer)
+            if not ret:
+                self.free.put(buffer)
+                return None
+        else:
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                return None
+
+        return frame, timestamp
+
+    def _timestamp(self):
+        # For files, use the media time (CAP_PROP_POS_MSEC) of the grabbed frame
+        # For webcam, use capture time
+        if self.is_file:
+            return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        return time.time()
+
+    def _free_buffer(self):
+        # Blocks the decode thread while the consumer holds every buffer
+        while True:
+            try:
+                return self.free.get(timeout=0.1)
+            except queue.Empty:
+                if self.stopped.is_set():
+                    return None
+
+    def _next_prefetched(self):
+        if self.finished:
+            return None
+        if self.thread is None:
+            self.queue = queue.Queue(maxsize=self.prefetch)
+            self.thread = threading.Thread(target=self._decode_loop, daemon=True)
+            self.thread.start()
+
+        item = self.queue.get()
+        if item is None or isinstance(item, Exception):
+            self.finished = True
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def _decode_loop(self):
+        # Background decode thread: fills the queue, None marks the end
+        try:
+            while not self.stopped.is_set():
+                item = self._read()
+                if item is None:
+                    break
+
+                if not self.is_file:
+                    # Live source: keep the newest frames, drop the oldest queued
+                    while True:
+                        try:
+                            self.queue.put_nowait(item)
+                            break
+                        except queue.Full:
+                            try:
+                                dropped = self.queue.get_nowait()
+                                if self.free is not None:
+                                    self.free.put(dropped[0])
+                            except queue.Empty:
+                                pass
+                    continue
+
+                # File: wait for the consumer, but wake up to honor release()
+                while not self.stopped.is_set():
+                    try:
+                        self.queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            item = e
+        else:
+            item = None
+
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+
+    def seek(self, seconds):
+        """Move a file source to `seconds` from the start (before iterating)."""
+        if self.thread is not None:
+            raise RuntimeError("Cannot seek once prefetching has started")
+        self.cap.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000.0)
 
     def release(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
         self.cap.release()
@@ -0,0 +1,209 @@
+"""Batch rPPG liveness analysis of archived videos."""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.rppg.processor import RPPGProcessor
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+# One processor per worker process, created by _init_worker
+_processor = None
+
+def find_videos(inputs):
+    """
+    Expand files, directories (recursively) and glob patterns into video paths.
+
+    Args:
+        inputs: List of paths or glob patterns.
+
+    Returns:
+        list: Sorted unique video file paths.
+    """
+    videos = set()
+    for item in inputs:
+        paths = glob.glob(item, recursive=True) if glob.has_magic(item) else [item]
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    videos.update(
+                        os.path.join(root, name) for name in files
+                        if name.lower().endswith(VIDEO_EXTENSIONS)
+                    )
+            elif os.path.isfile(path):
+                videos.add(path)
+            else:
+                print(f"Skipping missing input: {path}", file=sys.stderr)
+    return sorted(videos)
+
+def video_duration(path):
+    """Duration of a video file in seconds (0 if unknown)."""
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    finally:
+        cap.release()
+    return frames / fps if fps > 0 and frames > 0 else 0.0
+
+def plan_jobs(videos, chunk_sec=None, min_chunk_sec=5.0):
+    """
+    Split videos into (path, chunk, start, duration) jobs.
+
+    Without `chunk_sec` every video is one job. Otherwise long videos are cut
+    into `chunk_sec` pieces; a trailing piece shorter than `min_chunk_sec`
+    (too short for a stable heart rate) is merged into the previous one.
+    """
+    jobs = []
+    for path in videos:
+        total = video_duration(path) if chunk_sec else 0.0
+        if not chunk_sec or total <= chunk_sec:
+            jobs.append((path, 0, 0.0, None))
+            continue
+
+        starts = [i * chunk_sec for i in range(int(total // chunk_sec) + 1)]
+        if total - starts[-1] < min_chunk_sec:
+            starts.pop()
+        for i, start in enumerate(starts):
+            duration = chunk_sec if i < len(starts) - 1 else None # Last chunk runs to the end
+            jobs.append((path, i, start, duration))
+    return jobs
+
+def _init_worker(fs, method):
+    global _processor
+    # Parallelism comes from the process pool; keep OpenCV single-threaded per worker
+    cv2.setNumThreads(1)
+    _processor = RPPGProcessor(fs=fs, method=method)
+
+def _analyze(job):
+    path, chunk, start, duration = job
+    # Don't carry the tracked face over from the previous job
+    _processor.face_tracker.reset()
+
+    t0 = time.perf_counter()
+    try:
+        results = _processor.process_video(path, duration=duration, start=start)
+    except Exception as e:
+        results = {"error": str(e)}
+    elapsed = time.perf_counter() - t0
+
+    row = {"video": path, "chunk": chunk, "start_s": start}
+    row.update(flatten_results(results))
+    row["elapsed_s"] = round(elapsed, 3)
+    return row
+
+def flatten_results(results):
+    """Flatten process_video results into a single-level row."""
+    row = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            prefix = key[:-len("_features")] if key.endswith("_features") else key
+            for name, v in value.items():
+                row[f"{prefix}_{name}"] = float(v)
+        elif hasattr(value, "item"): # NumPy scalars
+            row[key] = value.item()
+        else:
+            row[key] = value
+    return row
+
+def summarize(rows):
+    """
+    Combine the chunk rows of one video into a per-video row.
+
+    Numeric columns are averaged over the chunks that produced a result;
+    the label follows the averaged liveness score.
+    """
+    ok = [r for r in rows if "error" not in r]
+    summary = {"video": rows[0]["video"], "chunk": "all", "start_s": 0.0}
+    if not ok:
+        summary["error"] = rows[0].get("error", "No chunk processed")
+        return summary
+
+    for key in ok[0]:
+        if key in summary or key == "label":
+            continue
+        values = [r[key] for r in ok if isinstance(r.get(key), (int, float))]
+        if values:
+            summary[key] = sum(values) / len(values)
+    summary["frames"] = sum(r.get("frames", 0) for r in ok)
+    summary["elapsed_s"] = round(sum(r["elapsed_s"] for r in rows), 3)
+    summary["label"] = "LIVE" if summary.get("liveness_score", 0.0) > 0.5 else "SUSPECT"
+    return summary
+
+def write_results(rows, output):
+    """Write rows as JSONL (.jsonl) or CSV (anything else); '-' prints JSONL."""
+    if output == "-":
+        for row in rows:
+            print(json.dumps(row))
+        return
+
+    if output.endswith(".jsonl"):
+        with open(output, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        return
+
+    # CSV columns: union of all keys, in first-seen order
+    columns = []
+    for row in rows:
+        columns.extend(k for k in row if k not in columns)
+    with open(output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch rPPG liveness analysis")
+    parser.add_argument("inputs", nargs="+", help="Video files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="-", help="Output .csv or .jsonl file ('-' for JSONL on stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--chunk-sec", type=float, default=None, help="Split videos into chunks of this many seconds")
+    parser.add_argument("--per-chunk", action="store_true", help="Also write one row per chunk")
+    parser.add_argument("--fs", type=int, default=30, help="Sampling rate (Hz)")
+    parser.add_argument("--method", default="pos", choices=["pos", "green"], help="rPPG method")
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        print("No videos found.", file=sys.stderr)
+        return 1
+
+    jobs = plan_jobs(videos, chunk_sec=args.chunk_sec)
+    print(f"Analyzing {len(videos)} videos ({len(jobs)} jobs) on {args.workers} workers", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    by_video = {}
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.fs, args.method)) as pool:
+        futures = [pool.submit(_analyze, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            by_video.setdefault(row["video"], []).append(row)
+            print(f"[{done}/{len(jobs)}] {row['video']} chunk {row['chunk']}", file=sys.stderr)
+
+    rows = []
+    for video in videos:
+        chunks = sorted(by_video[video], key=lambda r: r["chunk"])
+        if len(chunks) == 1:
+            rows.append(chunks[0])
+            continue
+        if args.per_chunk:
+            rows.extend(chunks)
+        rows.append(summarize(chunks))
+
+    write_results(rows, args.output)
+    print(f"Done in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
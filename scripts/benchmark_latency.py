@@ -1,10 +1,120 @@
-"""Benchmark pipeline latency."""
+"""Benchmark pipeline latency.
+
+Simulates concurrent /ws/liveness clients in-process: every session sends
+JPEG frames in the wire format at a fixed frame rate through the same
+`process_message` path the WebSocket handler uses. For a growing number of
+sessions it reports event-loop lag, frame latency (from the scheduled
+send time to the result, so time spent waiting for a blocked loop counts)
+and the mean number of liveness analyses per session, with frames
+processed inline on the event loop and on the worker pool.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from apps.backend import metrics, protocol
+from apps.backend.api import ws
+
+PULSE_HZ = 1.2
+
+def synth_frames(fs, size=(480, 640), seed=0):
+    """
+    JPEG frames of a pulsing skin-colored face on a noisy background.
+
+    Covers 5 s, a whole number of pulse periods, so the frames can be
+    replayed in a loop without a phase jump.
+    """
+    rng = np.random.default_rng(seed)
+    h, w = size
+    frames = []
+    for k in range(int(round(5 * fs))):
+        t = k / fs
+        frame = rng.integers(40, 80, (h, w, 3), dtype=np.uint8)
+        skin = (120, 140 + 2 * np.sin(2 * np.pi * PULSE_HZ * t), 190)
+        cv2.ellipse(frame, (w // 2, h // 2), (w // 6, h // 4), 0, 0, 360, skin, -1)
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        frames.append(jpeg.tobytes())
+    return frames
+
+def make_message(jpeg, k, fs, binary):
+    """Frame message `k` of a session; capture timestamps keep increasing across loops."""
+    t_ms = k / fs * 1000.0
+    if binary:
+        return protocol.encode_binary(jpeg, k, t_ms)
+    return json.dumps({
+        "image": "data:image/jpeg;base64," + base64.b64encode(jpeg).decode(),
+        "timestamp": t_ms
+    })
+
+async def client(frames, fs, seconds, fixed_box, binary):
+    session = ws.LivenessSession(engine=None)
+    if fixed_box is not None:
+        session.face_detector.detect = lambda frame: fixed_box
+    latencies = []
+    start = time.perf_counter()
+    for k in range(int(seconds * fs)):
+        message = make_message(frames[k % len(frames)], k, fs, binary)
+        due = start + k / fs
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await ws.process_message(session, message)
+        latencies.append((time.perf_counter() - due) * 1000.0)
+    return latencies, session.analysis_count
+
+async def run(sessions, frames, fs, seconds, fixed_box, binary):
+    metrics.loop_lag = metrics.LoopLagMonitor(interval_ms=10.0)
+    metrics.loop_lag.start()
+    results = await asyncio.gather(*[
+        client(frames, fs, seconds, fixed_box, binary) for _ in range(sessions)
+    ])
+    metrics.loop_lag.stop()
+    latencies = np.concatenate([latencies for latencies, _ in results])
+    analyses = np.mean([count for _, count in results])
+    return metrics.loop_lag.lag.summary(), np.percentile(latencies, [50, 99]), analyses
 
 def benchmark():
+    parser = argparse.ArgumentParser(description="Liveness WebSocket latency benchmark")
+    parser.add_argument("--sessions", default="1,4,8,16", help="Comma-separated session counts")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--fps", type=int, default=15, help="Frames per second per session")
+    parser.add_argument("--workers", type=int, default=4, help="Frame worker threads")
+    parser.add_argument("--binary", action="store_true", help="Send binary frames instead of JSON")
+    parser.add_argument("--fixed-box", action="store_true",
+                        help="Skip Haar detection with a fixed face box (the synthetic face is not detectable)")
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    frames = synth_frames(args.fps)
+    size = np.mean([len(make_message(jpeg, 0, args.fps, args.binary)) for jpeg in frames])
+    fixed_box = (213, 120, 213, 240) if args.fixed_box else None
+
     print("Latency Benchmark")
-    # Add benchmarking logic
-    pass
+    print(f"{args.fps} fps per session, {args.seconds:.0f} s per run, {args.workers} workers, "
+          f"{'binary' if args.binary else 'JSON'} frames of {size / 1024:.0f} KiB")
+    print(f"{'mode':<8} {'sessions':>8} {'lag p99 ms':>11} {'lag max ms':>11} {'frame p50 ms':>13} "
+          f"{'frame p99 ms':>13} {'analyses':>9}")
+    for mode in ("inline", "pool"):
+        ws.executor = ThreadPoolExecutor(max_workers=args.workers) if mode == "pool" else None
+        for sessions in [int(n) for n in args.sessions.split(",")]:
+            lag, (p50, p99), analyses = asyncio.run(
+                run(sessions, frames, args.fps, args.seconds, fixed_box, args.binary)
+            )
+            print(f"{mode:<8} {sessions:>8} {lag['p99_ms']:>11.1f} {lag['max_ms']:>11.1f} {p50:>13.1f} "
+                  f"{p99:>13.1f} {analyses:>9.1f}")
+        if ws.executor is not None:
+            ws.executor.shutdown()
 
 if __name__ == "__main__":
     benchmark()
@@ -28,7 +28,7 @@ def main():
     
     for frame, timestamp in video:
         # Process frame
-        result = processor.process_frame(frame)
+        result = processor.process_frame(frame, timestamp)
         
         # Visualization
         bbox = result.get('bbox')